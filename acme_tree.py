@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tiny Java tree shared by the end-to-end tests, and a helper that runs the CLI
+against it.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SCRIPT = Path(__file__).parent / 'java_dep_graph.py'
+
+CONF = """import_include_patterns=^com[.]acme[.].*
+import_exclude_patterns=^java[.]
+ripgrep_exclude_patterns=!**/test/**
+"""
+
+SOURCES = {
+    'src/main/java/com/acme/api/Pricing.java':
+        'package com.acme.api;\n\npublic interface Pricing {\n}\n',
+    'src/main/java/com/acme/impl/PricingImpl.java':
+        'package com.acme.impl;\n\nimport com.acme.api.Pricing;\n\n'
+        'public class PricingImpl\n  implements Pricing {\n}\n',
+    'src/main/java/com/acme/api/Quote.java':
+        'package com.acme.api;\n\nimport com.acme.api.Pricing;\n\npublic interface Quote {\n}\n',
+    'src/main/java/com/acme/svc/QuoteService.java':
+        'package com.acme.svc;\n\nimport com.acme.api.*;\nimport java.util.List;\n\n'
+        'public class QuoteService {\n}\n',
+    'src/main/java/com/acme/svc/Checkout.java':
+        'package com.acme.svc;\n\nimport com.acme.svc.QuoteService;\n\npublic class Checkout {\n}\n',
+    'src/test/java/com/acme/PricingTest.java':
+        'package com.acme;\n\nimport com.acme.api.Pricing;\n\npublic class PricingTest {\n}\n',
+}
+
+
+def make_tree(tmp_path):
+    root = tmp_path / 'repo'
+    for rel, text in SOURCES.items():
+        f = root / rel
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(text)
+    (tmp_path / 'java-dep-graph.conf').write_text(CONF)
+    return root
+
+
+def run(tmp_path, *args):
+    result = subprocess.run([sys.executable, str(SCRIPT), *args], capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+# a bounded generic subclass: the `extends` inside the type parameters is not its superclass
+GENERIC_SOURCES = {
+    'src/main/java/com/acme/repo/Entity.java': 'package com.acme.repo;\n\npublic interface Entity {\n}\n',
+    'src/main/java/com/acme/repo/BaseRepo.java': 'package com.acme.repo;\n\npublic abstract class BaseRepo<T> {\n}\n',
+    'src/main/java/com/acme/repo/Repo.java':
+        'package com.acme.repo;\n\npublic class Repo<T extends Entity> extends BaseRepo<T> {\n}\n',
+}
+
+
+def add_generic_repo(root):
+    for rel, text in GENERIC_SOURCES.items():
+        f = root / rel
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(text)
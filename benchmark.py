@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""Benchmark harness for the traversal engines on synthetic trees.
+
+For every requested size a tree is generated with `synth_repo.generate` (and
+kept in ``--workdir`` for later runs), then each engine is timed on:
+
+- ``setup``: what a run does before its first query (files cache, graph
+  scan or index build);
+- ``reverse``: `reverse_dependants` for a seeded sample of targets;
+- ``imports``: `list_imports_of_class` for the same targets;
+- ``dot``: `generate_dot` (engine independent except for ``index``).
+
+Each engine runs once per ``--backends`` scan backend (`rg_runner.set_backend`),
+so ripgrep and the in-process `native_scan.NativeBackend` can be compared.
+
+Each measurement is the best of ``--repeat`` runs with the parse cache
+cleared first; the OS file cache stays warm. Results, with the commit and
+environment they were taken on, are written as JSON for comparison between
+commits::
+
+    python benchmark.py --sizes 1000,10000 --out bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import java_dep_graph
+import parser
+import profiler
+import rg_runner
+import synth_repo
+from graph import ImportGraph
+from index import ImportIndex
+from locator import ClassLocator
+
+ENGINES = ('rg-per-node', 'rg-frontier', 'graph', 'index')
+OPS = ('setup', 'reverse', 'imports', 'dot')
+
+
+def tree_for(workdir: Path, files: int, seed: int) -> Path:
+    """Generated tree of about ``files`` files, reused when already on disk."""
+    root = workdir / f'synth-{files}-s{seed}'
+    done = root / '.generated'
+    if not done.exists():
+        classes = synth_repo.classes_for_files(files)
+        counts = synth_repo.generate(root, classes=classes, packages=max(10, classes // 50), seed=seed)
+        done.write_text(json.dumps(counts))
+    return root
+
+
+def _measure(fn, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        parser.PARSE_CACHE.clear()
+        profile = profiler.Profile(trace_memory=False).start()
+        started = time.perf_counter()
+        try:
+            with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+                fn()
+        finally:
+            elapsed = time.perf_counter() - started
+            profile.stop()
+        if best is None or elapsed < best['seconds']:
+            best = {'seconds': round(elapsed, 6),
+                    'rg_calls': profile.counters.get('rg_calls', 0),
+                    'native_scans': profile.counters.get('native_scans', 0),
+                    'files_parsed': profile.counters.get('files_parsed', 0)}
+    return best
+
+
+def bench_tree(root: Path, engines, ops, targets: int, levels: int, seed: int, repeat: int, backend: str = 'rg'):
+    """Yield one result record per (engine, op, target) for the tree at ``root``, scanning with ``backend``."""
+    cwd = Path.cwd()
+    os.chdir(root)  # load_config reads java-dep-graph.conf from the working directory
+    previous = rg_runner.BACKEND
+    rg_runner.set_backend(backend)
+    try:
+        with open(os.devnull, 'w') as sink, contextlib.redirect_stderr(sink):
+            cfg = java_dep_graph.load_config()
+        names = sorted(p.stem for p in rg_runner.run_rg_files(root) if not p.stem.endswith(('Impl', 'Test')))
+        sample = random.Random(seed).sample(names, min(targets, len(names)))
+        name_locator = ClassLocator.build(root)
+        fqns = [java_dep_graph.resolve_target_fqn(root, name, locator=name_locator) for name in sample]
+        for engine in engines:
+            state = {}
+
+            def setup():
+                index = None
+                if engine == 'graph':
+                    index = ImportGraph.scan(root)
+                elif engine == 'index':
+                    index = ImportIndex.build(root)
+                state['index'] = index
+                state['files_cache'] = (index.precompute_files_cache(cfg) if index is not None
+                                        else rg_runner.precompute_files_cache(cfg, root))
+
+            result = _measure(setup, repeat)
+            if 'setup' in ops:
+                yield dict(engine=engine, op='setup', **result)
+            index, files_cache = state['index'], state['files_cache']
+            # as in `java_dep_graph.run_query`
+            parser.PACKAGES = java_dep_graph.package_index(root, index)
+            if 'reverse' in ops:
+                for fqn in fqns:
+                    result = _measure(lambda: java_dep_graph.reverse_dependants(
+                        root, fqn, cfg, levels=levels, sort_strategy='lex', files_cache=files_cache,
+                        index=index, batched=(engine == 'rg-frontier')), repeat)
+                    yield dict(engine=engine, op='reverse', target=fqn, levels=levels, **result)
+            if 'imports' in ops:
+                for fqn in fqns:
+                    result = _measure(lambda: java_dep_graph.list_imports_of_class(
+                        root, fqn, cfg, files_cache=files_cache, index=index), repeat)
+                    yield dict(engine=engine, op='imports', target=fqn, **result)
+            if 'dot' in ops and engine in ('rg-per-node', 'index'):
+                result = _measure(lambda: java_dep_graph.generate_dot(root, cfg, index=index), repeat)
+                yield dict(engine=engine, op='dot', **result)
+            if index is not None and engine == 'index':
+                index.close()
+    finally:
+        parser.PACKAGES = None
+        rg_runner.BACKEND = previous
+        os.chdir(cwd)
+
+
+def environment() -> dict:
+    def output(cmd):
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, cwd=java_dep_graph.SCRIPT_DIR).stdout.strip()
+        except OSError:
+            return ''
+    return {
+        'commit': output(['git', 'rev-parse', 'HEAD']),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'ripgrep': output(['rg', '--version']).split('\n')[0],
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def main():
+    argp = argparse.ArgumentParser(description='Time the traversal engines on synthetic Java trees')
+    argp.add_argument('--sizes', default='1000,10000', help='Comma-separated approximate file counts (default: %(default)s)')
+    argp.add_argument('--engines', default=','.join(ENGINES), help='Comma-separated engines (default: all)')
+    argp.add_argument('--backends', default='rg,native',
+                      help='Comma-separated scan backends each engine is run with (default: %(default)s)')
+    argp.add_argument('--ops', default=','.join(OPS), help='Comma-separated operations (default: all)')
+    argp.add_argument('--targets', type=int, default=5, help='Targets sampled per tree (default: %(default)s)')
+    argp.add_argument('--levels', type=int, default=3, help='--levels used for reverse queries (default: %(default)s)')
+    argp.add_argument('--repeat', type=int, default=1, help='Runs per measurement; the best is kept (default: %(default)s)')
+    argp.add_argument('--seed', type=int, default=1)
+    argp.add_argument('--workdir', default=str(Path(tempfile.gettempdir()) / 'java-dep-graph-bench'),
+                      help='Where generated trees are kept between runs (default: %(default)s)')
+    argp.add_argument('--out', default='bench.json', help='JSON results file (default: %(default)s)')
+    args = argp.parse_args()
+
+    engines = [e for e in args.engines.split(',') if e]
+    ops = [o for o in args.ops.split(',') if o]
+    backends = [b for b in args.backends.split(',') if b]
+    unknown = (sorted(set(engines) - set(ENGINES)) + sorted(set(ops) - set(OPS))
+               + sorted(set(backends) - set(rg_runner.SCAN_BACKENDS)))
+    if unknown:
+        argp.error(f"unknown engine/op/backend: {', '.join(unknown)}")
+    workdir = Path(args.workdir)
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = []
+    for size in (int(s) for s in args.sizes.split(',') if s):
+        root = tree_for(workdir, size, args.seed)
+        counts = json.loads((root / '.generated').read_text())
+        for backend in backends:
+            for record in bench_tree(root.resolve(), engines, ops, args.targets, args.levels, args.seed, args.repeat,
+                                     backend):
+                record = dict(size=size, files=counts['files'], backend=backend, **record)
+                results.append(record)
+                scans = record['rg_calls'] + record['native_scans']
+                print(f"{record['files']:>7} files  {backend:<6} {record['engine']:<12} {record['op']:<8} "
+                      f"{record['seconds']:>9.3f}s  scans={scans:<5} {record.get('target', '')}", file=sys.stderr)
+    Path(args.out).write_text(json.dumps({'environment': environment(), 'parameters': vars(args),
+                                          'results': results}, indent=2) + '\n')
+    print(f'Results written to: {args.out}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
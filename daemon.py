@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Long-running query daemon (``--serve``) and its thin client (``--connect``).
+
+The daemon loads the import index for one root into memory once and answers
+reverse, imports and DOT queries over HTTP on localhost. Before each query it
+runs `ImportIndex.refresh`, so files changed since the previous query are
+re-parsed lazily and only when someone asks.
+
+A query is the subset of CLI arguments that selects what to print (target,
+``--reverse``, ``--levels``, ``--nosort``); the daemon runs the normal CLI
+code path with stdout/stderr captured and sends both back, so the client
+prints exactly what a one-shot run would print.
+
+Only the local client is served: a request must name the bound address in
+its ``Host`` header (``localhost`` too when bound to 127.0.0.1) and carry no
+``Origin`` header, which rules out browser pages and DNS rebinding, and a
+query must be sent as ``application/json``, which a cross-origin form post
+cannot do without a preflight.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sys
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from typing import Callable
+
+DEFAULT_PORT = 8765
+
+# the arguments a client forwards; everything else is fixed when the daemon starts
+QUERY_KEYS = ('target', 'reverse', 'forward', 'levels', 'nosort', 'implicit_refs', 'impact', 'jsonl', 'cycles',
+              'all_blast_radius', 'targets')
+# the arguments the client itself uses; --connect rejects any other one
+CLIENT_KEYS = ('root', 'connect', 'port', 'profile', 'targets_file')
+
+
+class QueryServer(HTTPServer):
+    """HTTP server holding one warm index; requests are handled one at a time."""
+
+    def __init__(self, root: Path, index, answer: Callable, port: int = DEFAULT_PORT, host: str = '127.0.0.1'):
+        self.root = Path(root).resolve()
+        self.index = index
+        # answer(query: dict) runs one CLI query, printing to stdout/stderr
+        self.answer = answer
+        self.queries = 0
+        super().__init__((host, port), _Handler)
+
+    def run_query(self, query: dict) -> dict:
+        out, err = io.StringIO(), io.StringIO()
+        status = 0
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                self.index.refresh()
+                self.answer(query)
+            except SystemExit as e:
+                status = e.code if isinstance(e.code, int) else 1
+            except Exception as e:  # keep serving; report like an uncaught CLI error
+                print(f'Error: {type(e).__name__}: {e}', file=sys.stderr)
+                status = 1
+        self.queries += 1
+        return {'stdout': out.getvalue(), 'stderr': err.getvalue(), 'status': status}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: QueryServer
+
+    def _reply(self, code: int, payload: dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _refused(self) -> bool:
+        """Reply 403 and return True unless the request comes from a local client."""
+        host, port = self.server.server_address[:2]
+        allowed = {f'{host}:{port}'}
+        if host == '127.0.0.1':
+            allowed.add(f'localhost:{port}')
+        if self.headers.get('Host') not in allowed or 'Origin' in self.headers:
+            self._reply(403, {'error': 'only local clients may query this daemon'})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._refused():
+            return
+        if self.path != '/status':
+            self._reply(404, {'error': 'not found'})
+            return
+        self._reply(200, {'root': str(self.server.root), 'queries': self.server.queries})
+
+    def do_POST(self):
+        if self._refused():
+            return
+        if self.path != '/query':
+            self._reply(404, {'error': 'not found'})
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._reply(415, {'error': 'queries must be sent as application/json'})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            self._reply(400, {'error': 'request body is not JSON'})
+            return
+        root = request.get('root')
+        if root and Path(root).resolve() != self.server.root:
+            self._reply(200, {'stdout': '', 'status': 1,
+                              'stderr': f"Error: daemon serves '{self.server.root}', not '{root}'.\n"})
+            return
+        if request.get('all_blast_radius') not in (None, '-', '-.json'):
+            # a query prints; the client writes any output file itself
+            self._reply(400, {'error': 'all_blast_radius must be printed to stdout'})
+            return
+        self._reply(200, self.server.run_query({k: request.get(k) for k in QUERY_KEYS}))
+
+    def log_message(self, format, *args):
+        # one line per request would interleave with query output on a terminal
+        pass
+
+
+def query(root: Path, args: dict, port: int = DEFAULT_PORT, host: str = '127.0.0.1') -> dict:
+    """Send one query to a running daemon and return its captured output."""
+    payload = {'root': str(root), **{k: args.get(k) for k in QUERY_KEYS}}
+    req = urllib.request.Request(f'http://{host}:{port}/query', data=json.dumps(payload).encode('utf-8'),
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return {'stdout': '', 'status': 1,
+                'stderr': f'Error: daemon on {host}:{port} refused the query (HTTP {e.code} {e.reason}).\n'}
+    except (urllib.error.URLError, ConnectionError) as e:
+        reason = getattr(e, 'reason', e)
+        return {'stdout': '', 'status': 1,
+                'stderr': f'Error: no java-dep-graph daemon on {host}:{port} ({reason}); start one with --serve.\n'}
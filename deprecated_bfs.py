@@ -6,7 +6,7 @@ should migrate to DFS-based APIs.
 """
 import warnings
 from rg_runner import build_rg_exclude_args, run_ripgrep
-from parser import parse_package_and_imports, apply_filters, is_test_path
+from parser import parse_package_and_imports, import_filter, is_test_path
 from pathlib import Path
 
 
@@ -15,6 +15,7 @@ def traverse_reverse_bfs(root, target_fqn, cfg, levels=0, sort_strategy=None, fi
     Returns list of (level, dep, parent)
     """
     warnings.warn('traverse_reverse_bfs is deprecated and moved to deprecated_bfs module', DeprecationWarning)
+    accept = import_filter(cfg)
     seen = set([target_fqn])
     results = []
     frontier = [target_fqn]
@@ -36,12 +37,12 @@ def traverse_reverse_bfs(root, target_fqn, cfg, levels=0, sort_strategy=None, fi
                 link = (cur, dep)
                 if dep in seen:
                     # already discovered elsewhere: record the parent link but do not add to next frontier
-                    if apply_filters(dep, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                    if accept(dep):
                         if link not in recorded_links:
                             recorded_links.add(link)
                             results.append((current_level + 1, dep, cur))
                     continue
-                if not apply_filters(dep, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                if not accept(dep):
                     continue
                 seen.add(dep)
                 if link not in recorded_links:
@@ -49,7 +50,7 @@ def traverse_reverse_bfs(root, target_fqn, cfg, levels=0, sort_strategy=None, fi
                     results.append((current_level + 1, dep, cur))
                 next_frontier.append(dep)
                 for imp in implements:
-                    if imp not in seen and apply_filters(imp, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                    if imp not in seen and accept(imp):
                         seen.add(imp)
                         link2 = (cur, imp)
                         if link2 not in recorded_links:
@@ -2,13 +2,45 @@
 from __future__ import annotations
 
 from rg_runner import build_rg_exclude_args, run_ripgrep
+import profiler
 import rg_runner
-from parser import parse_package_and_imports, apply_filters, is_test_path
+from parser import PARSE_CACHE, parse_extends, parse_package_and_imports, import_filter, is_test_path
+from idgraph import EdgeList, Interner, pack
 from pathlib import Path
+import os
+import re
 import sys
+import tempfile
+from collections import OrderedDict
 from typing import Dict, List, Tuple
 
 
+# Above this many bytes of file arguments, searches run over the root and are
+# filtered to ``files_cache`` afterwards instead of passing every file in argv
+# (which can exceed ARG_MAX on huge caches).
+ARGV_FILES_BUDGET = 64 * 1024
+
+
+def _search_scope(root: Path, cfg: dict | None, files_cache: List[Path] | None):
+    """Return ``(cmd_args, keep)`` describing which files a search covers.
+
+    ``cmd_args`` holds the glob options and paths to append to an rg command;
+    ``keep`` is None or the set of path strings the results must be limited to.
+    """
+    args = build_rg_exclude_args(cfg)
+    # If ripgrep include patterns are not provided by cfg, fallback to searching all java files.
+    # Support old `include_globs` key for backward compatibility.
+    if not (cfg and (cfg.get('ripgrep_include_patterns') or cfg.get('include_globs'))):
+        args += ['-g', '*.java']
+    if not files_cache:
+        return args + [str(root)], None
+    paths = [str(p) for p in files_cache]
+    if sum(len(p) + 1 for p in paths) <= ARGV_FILES_BUDGET:
+        # explicit paths bypass ripgrep's globs
+        return args + paths, None
+    return ['-g', '*.java', str(root)], {str(Path(p)) for p in paths}
+
+
 def find_matches_for(
     cur: str,
     root: Path,
@@ -17,30 +49,174 @@ def find_matches_for(
     sort_strategy: str | None = None,
 ) -> List[Path]:
     """Return files importing ``cur`` by running ripgrep with include/exclude filters."""
-    cur_pkg = cur.rsplit('.', 1)[0] if '.' in cur else ''
-    cmd = ['rg'] + build_rg_exclude_args(cfg) + ['--files-with-matches', '-F']
-    # If ripgrep include patterns are not provided by cfg, fallback to searching all java files.
-    # Support old `include_globs` key for backward compatibility.
-    if not (cfg and (cfg.get('ripgrep_include_patterns') or cfg.get('include_globs'))):
-        cmd += ['-g', '*.java']
-    cmd += ['-e', f'import {cur};']
-    if cur_pkg:
-        cmd += ['-e', f'import {cur_pkg}.*;']
-    if files_cache:
-        cmd += [str(p) for p in files_cache]
-    else:
-        cmd.append(str(root))
+    cmd, keep = _matches_command(cur, root, cfg, files_cache)
     try:
         matches = run_ripgrep(cmd)
     except RuntimeError as e:
-        import sys
         print('rg error:', str(e), file=sys.stderr)
         return []
+    return _finish_matches(matches, keep, sort_strategy)
+
+
+def _matches_command(cur: str, root: Path, cfg: dict | None, files_cache: List[Path] | None):
+    """The `find_matches_for` ripgrep command for ``cur`` and its ``keep`` filter."""
+    cur_pkg = cur.rsplit('.', 1)[0] if '.' in cur else ''
+    scope, keep = _search_scope(root, cfg, files_cache)
+    cmd = ['rg', '--files-with-matches', '-F']
+    cmd += ['-e', f'import {cur};']
+    if cur_pkg:
+        cmd += ['-e', f'import {cur_pkg}.*;']
+    return cmd + scope, keep
+
+
+def _finish_matches(matches: List[Path], keep, sort_strategy: str | None) -> List[Path]:
+    if keep is not None:
+        matches = [m for m in matches if str(m) in keep]
     if sort_strategy == 'lex':
         matches = sorted(matches, key=lambda p: str(p))
     return matches
 
 
+_IMPORT_TEXT_RE = re.compile(r'import ([^\s;]+);')
+
+
+def find_matches_for_frontier(
+    frontier: List[str],
+    root: Path,
+    cfg: dict | None,
+    files_cache: List[Path] | None = None,
+    sort_strategy: str | None = None,
+) -> Dict[str, List[Path]]:
+    """`find_matches_for` for every node of ``frontier`` with a single ``rg --json`` call.
+
+    The ``import X;``/``import pkg.*;`` patterns of all nodes go to ripgrep
+    through a pattern file, and each matched line is attributed back to the
+    node(s) it imports.
+    """
+    by_fqn = set(frontier)
+    by_pkg: Dict[str, List[str]] = {}
+    patterns = []
+    for cur in frontier:
+        patterns.append(f'import {cur};')
+        if '.' in cur:
+            cur_pkg = cur.rsplit('.', 1)[0]
+            by_pkg.setdefault(cur_pkg, []).append(cur)
+            patterns.append(f'import {cur_pkg}.*;')
+    found: Dict[str, set] = {cur: set() for cur in frontier}
+    if not frontier:
+        return {}
+    scope, keep = _search_scope(root, cfg, files_cache)
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as pf:
+        pf.write('\n'.join(sorted(set(patterns))) + '\n')
+    try:
+        hits = rg_runner.run_ripgrep_json(['rg', '--json', '-F', '-f', pf.name] + scope)
+    except RuntimeError as e:
+        print('rg error:', str(e), file=sys.stderr)
+        hits = []
+    finally:
+        os.unlink(pf.name)
+    for path, line in hits:
+        if keep is not None and str(path) not in keep:
+            continue
+        for name in _IMPORT_TEXT_RE.findall(line):
+            if name.endswith('.*'):
+                for cur in by_pkg.get(name[:-2], ()):
+                    found[cur].add(path)
+            elif name in by_fqn:
+                found[name].add(path)
+    out = {}
+    for cur, paths in found.items():
+        matches = list(paths)
+        if sort_strategy == 'lex':
+            matches = sorted(matches, key=lambda p: str(p))
+        out[cur] = matches
+    return out
+
+
+def prefetch_matches_by_frontier(
+    root: Path,
+    target_fqn: str,
+    cfg: dict | None,
+    levels: int = 0,
+    sort_strategy: str | None = None,
+    files_cache: List[Path] | None = None,
+    parse=parse_package_and_imports,
+    candidates=None,
+    known: Dict[str, List[Path]] | None = None,
+) -> Dict[str, List[Path]]:
+    """Answer `find_matches_for` for every node `traverse_reverse_dfs` may expand.
+
+    Walks level by level (as `deprecated_bfs.traverse_reverse_bfs` does) with
+    one `find_matches_for_frontier` call per level. A node is queued when the
+    DFS could push it: a filtered dependent, an ``...Impl`` candidate that
+    implements it, or a type it implements. BFS reaches every node no deeper
+    than DFS does, so fetching levels ``0..levels-1`` covers every expansion.
+    Nodes already in ``known`` are expanded from it instead of searched again.
+    """
+    accept = import_filter(cfg)
+    candidates = candidates or (lambda simple_name: [])
+    known = known or {}
+    memo: Dict[str, List[Path]] = {}
+    frontier = [target_fqn]
+    depth = 0
+    while frontier and not (levels and depth >= levels):
+        batch = {cur: known[cur] for cur in frontier if cur in known}
+        batch.update(find_matches_for_frontier(
+            [cur for cur in frontier if cur not in known], root, cfg, files_cache, sort_strategy))
+        memo.update(batch)
+        next_frontier = set()
+        for matches in batch.values():
+            for f in matches:
+                if is_test_path(str(f)):
+                    continue
+                pkg, _, implements = parse(f)
+                dep = f'{pkg}.{f.stem}' if pkg else f.stem
+                if not accept(dep):
+                    continue
+                next_frontier.add(dep)
+                dep_simple = dep.split('.')[-1]
+                impl_simple = dep_simple if dep.endswith('Impl') else f'{dep_simple}Impl'
+                for candidate in candidates(impl_simple):
+                    impl_pkg, _, impl_implements = parse(candidate)
+                    impl_fqn = f'{impl_pkg}.{impl_simple}' if impl_pkg else impl_simple
+                    if dep in impl_implements and accept(impl_fqn):
+                        next_frontier.add(impl_fqn)
+                next_frontier.update(imp for imp in implements if accept(imp))
+        frontier = sorted(n for n in next_frontier if n not in memo)
+        depth += 1
+    return memo
+
+
+class DependentsMemo:
+    """Lookups shared by every traversal of one run.
+
+    ``matches`` maps a visited FQN to the files importing it,
+    ``files_by_name`` indexes the file inventory by file name and ``headers``
+    holds the ``(pkg, imports, implements)`` of the most recently parsed
+    files, at most ``maxsize`` of them (by default the bound of
+    `parser.PARSE_CACHE`). The first two depend on ``cfg``, ``files_cache``
+    and ``sort_strategy``, so one memo must only be shared by traversals that
+    pass the same values.
+    """
+
+    def __init__(self, maxsize: int | None = None):
+        self.matches: Dict[str, List[Path]] = {}
+        self.files_by_name: Dict[str, List[Path]] | None = None
+        self.maxsize = maxsize if maxsize is not None else PARSE_CACHE.maxsize
+        self.headers: OrderedDict[Path, tuple] = OrderedDict()
+
+    def parse(self, path: Path, parse=parse_package_and_imports) -> tuple:
+        """``parse(path)``, computed once per path while it stays in the memo."""
+        header = self.headers.get(path)
+        if header is None:
+            header = self.headers[path] = parse(path)
+            if len(self.headers) > self.maxsize:
+                self.headers.popitem(last=False)
+        else:
+            self.headers.move_to_end(path)
+        return header
+
+
 def traverse_reverse_dfs(
     root: Path,
     target_fqn: str,
@@ -48,23 +224,126 @@ def traverse_reverse_dfs(
     levels: int = 0,
     sort_strategy: str | None = None,
     files_cache: List[Path] | None = None,
+    index=None,
+    batched: bool = False,
+    memo: DependentsMemo | None = None,
+    concurrency: int | None = None,
+    implicit=None,
 ) -> List[Tuple[int, str, str]]:
-    """Depth-first traversal producing (level, dependent, parent) triples."""
-    seen = set([target_fqn])
-    results = []  # list of (level, dep, parent)
+    """Depth-first traversal producing (level, dependent, parent) triples.
+
+    String form of `traverse_reverse_ids`, which takes the same options.
+    """
+    names = Interner()
+    edges = traverse_reverse_ids(root, target_fqn, cfg, names, levels=levels, sort_strategy=sort_strategy,
+                                 files_cache=files_cache, index=index, batched=batched, memo=memo,
+                                 concurrency=concurrency, implicit=implicit)
+    return [(lvl, names.name(dep), names.name(parent)) for parent, lvl, dep in edges.edges()]
+
+
+def traverse_reverse_ids(
+    root: Path,
+    target_fqn: str,
+    cfg: dict | None,
+    names: Interner,
+    levels: int = 0,
+    sort_strategy: str | None = None,
+    files_cache: List[Path] | None = None,
+    index=None,
+    batched: bool = False,
+    memo: DependentsMemo | None = None,
+    concurrency: int | None = None,
+    implicit=None,
+) -> EdgeList:
+    """Depth-first traversal recording ``(parent, level, dependent)`` edges as ids of ``names``.
+
+    When ``index`` (an `index.ImportIndex` or `graph.ImportGraph`) is given,
+    dependents and parsed headers are read from it and no ripgrep process is
+    spawned per node. Otherwise ``batched`` replaces the per-node ripgrep
+    calls with one call per BFS level (see `prefetch_matches_by_frontier`);
+    the result is the same. With ``concurrency`` > 1 the per-node ripgrep
+    calls of nodes waiting on the stack run in the background, up to that
+    many at a time (see `rg_runner.AsyncRipgrep`); nodes are still expanded
+    in stack order, so the result is the same. It defaults to
+    ``cfg['rg_concurrency']``. Pass a `DependentsMemo` to reuse dependents
+    and the file inventory across traversals, and a `refscan.ImplicitRefs`
+    as ``implicit`` to also follow same-package and fully-qualified
+    references that have no import line.
+    """
+    if concurrency is None:
+        concurrency = (cfg or {}).get('rg_concurrency') or 1
+    if concurrency > 1 and index is None and not batched:
+        with rg_runner.AsyncRipgrep(concurrency) as runner:
+            return _traverse_reverse_dfs(root, target_fqn, cfg, names, levels, sort_strategy, files_cache, None, False,
+                                         memo, runner, implicit)
+    return _traverse_reverse_dfs(root, target_fqn, cfg, names, levels, sort_strategy, files_cache, index, batched,
+                                 memo, None, implicit)
+
+
+def _traverse_reverse_dfs(root, target_fqn, cfg, names, levels, sort_strategy, files_cache, index, batched, memo, runner,
+                          implicit):
+    if memo is None:
+        memo = DependentsMemo()
+    parse = index.parse_package_and_imports if index is not None else parse_package_and_imports
+    def _parse(f: Path):
+        return memo.parse(f, parse)
+    if index is not None:
+        def _search(cur: str) -> List[Path]:
+            return index.find_matches_for(cur, cfg, files_cache, sort_strategy)
+    else:
+        def _search(cur: str) -> List[Path]:
+            return find_matches_for(cur, root, cfg, files_cache, sort_strategy)
+    pending = {}  # FQN -> (future, keep) of background searches
+    def _prefetch(cur: str, depth: int) -> None:
+        if (levels and depth >= levels) or cur in memo.matches or cur in pending:
+            return
+        cmd, keep = _matches_command(cur, root, cfg, files_cache)
+        pending[cur] = (runner.submit(cmd), keep)
+    def _matches(cur: str) -> List[Path]:
+        if cur in memo.matches:
+            profiler.add('dependents_memo_hits')
+        else:
+            profiler.add('dependents_memo_misses')
+            if cur in pending:
+                future, keep = pending.pop(cur)
+                try:
+                    memo.matches[cur] = _finish_matches(future.result(), keep, sort_strategy)
+                except RuntimeError as e:
+                    print('rg error:', str(e), file=sys.stderr)
+                    memo.matches[cur] = []
+            else:
+                memo.matches[cur] = _search(cur)
+        if implicit is not None:
+            return implicit.merge(cur, memo.matches[cur], sort_strategy)
+        return memo.matches[cur]
+    # nodes are interned ids of `names`; links are `idgraph.pack`ed (parent, dep) pairs
+    accept = import_filter(cfg)
+    target = names.id(target_fqn)
+    seen = set([target])
+    results = EdgeList()  # (parent, level, dep)
     recorded_links = set()
-    stack = [(target_fqn, 0)]
-    all_files = rg_runner.run_rg_files(root, cfg)
-    files_by_name = {}
-    for f in all_files:
-        files_by_name.setdefault(f.name, []).append(f)
+    stack = [(target, 0)]
+    if memo.files_by_name is None:
+        all_files = index.run_rg_files(cfg) if index is not None else rg_runner.run_rg_files(root, cfg)
+        memo.files_by_name = {}
+        for f in all_files:
+            memo.files_by_name.setdefault(f.name, []).append(f)
+    files_by_name = memo.files_by_name
     def _candidates(simple_name: str):
         return files_by_name.get(f"{simple_name}.java", [])
+    if batched and index is None:
+        memo.matches.update(prefetch_matches_by_frontier(
+            root, target_fqn, cfg, levels, sort_strategy, files_cache, _parse, _candidates, known=memo.matches))
+    scheduled = 0  # stack[:scheduled] already has its searches started
     while stack:
+        if runner is not None:
+            for node, node_depth in stack[scheduled:]:
+                _prefetch(names.name(node), node_depth)
         cur, depth = stack.pop()
+        scheduled = len(stack)
         if levels and depth >= levels:
             continue
-        matches = find_matches_for(cur, root, cfg, files_cache, sort_strategy)
+        matches = _matches(names.name(cur))
         if sort_strategy == 'lex':
             iter_matches = list(reversed(matches))
         else:
@@ -73,62 +352,118 @@ def traverse_reverse_dfs(
             s = str(f)
             if is_test_path(s):
                 continue
-            pkg, _, implements = parse_package_and_imports(f)
+            pkg, _, implements = _parse(f)
             cls = f.stem
-            dep = f'{pkg}.{cls}' if pkg else cls
-            link = (cur, dep)
+            dep_name = f'{pkg}.{cls}' if pkg else cls
+            dep = names.id(dep_name)
+            link = pack(cur, dep)
             if dep in seen:
                 # already discovered elsewhere: record the parent link but do not traverse again
-                if apply_filters(dep, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                if accept(dep_name):
                     if link not in recorded_links:
                         recorded_links.add(link)
-                        results.append((depth + 1, dep, cur))
+                        results.add(cur, depth + 1, dep)
                 continue
-            if not apply_filters(dep, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+            if not accept(dep_name):
                 continue
             seen.add(dep)
             if link not in recorded_links:
                 recorded_links.add(link)
-                results.append((depth + 1, dep, cur))
+                results.add(cur, depth + 1, dep)
             stack.append((dep, depth + 1))
             
             # If this is an implementation class, look for its interface and add both as siblings
-            dep_simple = dep.split('.')[-1]
-            if dep.endswith('Impl') or dep.endswith('OperationImpl'):
+            dep_simple = dep_name.split('.')[-1]
+            if dep_name.endswith('Impl') or dep_name.endswith('OperationImpl'):
                 for candidate in _candidates(dep_simple):
-                    impl_pkg, _, impl_implements = parse_package_and_imports(candidate)
+                    impl_pkg, _, impl_implements = _parse(candidate)
                     impl_fqn = f'{impl_pkg}.{dep_simple}' if impl_pkg else dep_simple
-                    if dep in impl_implements and impl_fqn not in seen and apply_filters(impl_fqn, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
-                        seen.add(impl_fqn)
-                        impl_link = (cur, impl_fqn)
+                    impl_id = names.id(impl_fqn)
+                    if dep_name in impl_implements and impl_id not in seen and accept(impl_fqn):
+                        seen.add(impl_id)
+                        impl_link = pack(cur, impl_id)
                         if impl_link not in recorded_links:
                             recorded_links.add(impl_link)
-                            results.append((depth + 1, impl_fqn, cur))
-                        stack.append((impl_fqn, depth + 1))
-            elif not dep.endswith('Impl') and not dep.endswith('OperationImpl'):
+                            results.add(cur, depth + 1, impl_id)
+                        stack.append((impl_id, depth + 1))
+            elif not dep_name.endswith('Impl') and not dep_name.endswith('OperationImpl'):
                 impl_simple_name = f'{dep_simple}Impl'
                 for candidate in _candidates(impl_simple_name):
-                    impl_pkg, _, impl_implements = parse_package_and_imports(candidate)
+                    impl_pkg, _, impl_implements = _parse(candidate)
                     impl_fqn = f'{impl_pkg}.{impl_simple_name}' if impl_pkg else impl_simple_name
-                    if dep in impl_implements and impl_fqn not in seen and apply_filters(impl_fqn, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
-                        seen.add(impl_fqn)
-                        impl_link = (cur, impl_fqn)
+                    impl_id = names.id(impl_fqn)
+                    if dep_name in impl_implements and impl_id not in seen and accept(impl_fqn):
+                        seen.add(impl_id)
+                        impl_link = pack(cur, impl_id)
                         if impl_link not in recorded_links:
                             recorded_links.add(impl_link)
-                            results.append((depth + 1, impl_fqn, cur))
-                        stack.append((impl_fqn, depth + 1))
+                            results.add(cur, depth + 1, impl_id)
+                        stack.append((impl_id, depth + 1))
             
-            for imp in implements:
-                if imp not in seen and apply_filters(imp, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+            for imp_name in implements:
+                imp = names.id(imp_name)
+                if imp not in seen and accept(imp_name):
                     seen.add(imp)
-                    link2 = (cur, imp)
+                    link2 = pack(cur, imp)
                     if link2 not in recorded_links:
                         recorded_links.add(link2)
-                        results.append((depth + 1, imp, cur))
+                        results.add(cur, depth + 1, imp)
                     stack.append((imp, depth + 1))
     return results
 
 
+def traverse_forward_ids(
+    target_fqn: str,
+    cfg: dict | None,
+    names: Interner,
+    locator,
+    parse,
+    levels: int = 0,
+    sort_strategy: str | None = None,
+    parse_extends=parse_extends,
+) -> EdgeList:
+    """Depth-first walk of what ``target_fqn`` imports, as ``(parent, level, dependency)`` edges.
+
+    Each imported FQN is resolved to its file with ``locator`` (a
+    `locator.ClassLocator`) and its header read with ``parse`` and
+    ``parse_extends``; nothing is searched per node. Implemented/extended
+    types count as imports, also when they are in the same package and not
+    imported. Wildcard imports and types without a file under root (e.g.
+    libraries) are leaves.
+    """
+    accept = import_filter(cfg)
+    target = names.id(target_fqn)
+    seen = set([target])
+    results = EdgeList()
+    recorded_links = set()
+    stack = [(target, 0)]
+    while stack:
+        cur, depth = stack.pop()
+        if levels and depth >= levels:
+            continue
+        cur_name = names.name(cur)
+        if cur_name.endswith('.*'):
+            continue
+        f = locator.find_fqn(cur_name) or locator.find_fqn(cur_name, secondary=True)
+        if not f:
+            continue
+        _, imports, implements = parse(f)
+        supertypes = list(implements) + list(parse_extends(f))
+        deps = [d for d in dict.fromkeys(list(imports) + supertypes) if d != cur_name and accept(d)]
+        if sort_strategy == 'lex':
+            deps = sorted(deps, reverse=True)
+        for dep_name in deps:
+            dep = names.id(dep_name)
+            link = pack(cur, dep)
+            if link not in recorded_links:
+                recorded_links.add(link)
+                results.add(cur, depth + 1, dep)
+            if dep not in seen:
+                seen.add(dep)
+                stack.append((dep, depth + 1))
+    return results
+
+
 def traverse_reverse_bfs(root, target_fqn, cfg, levels=0, sort_strategy=None, files_cache=None):
     # Deprecated: delegate to deprecated_bfs module but keep wrapper for
     # backwards compatibility.
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""In-memory import graph built from a single ripgrep pass.
+
+`ImportGraph.scan` runs one ``rg --files`` and one ``rg --json`` over the
+whole tree, extracting every ``package`` and ``import`` line together with
+its file. File keys are numbered in sorted order, imported names are interned
+(`idgraph.Interner`) and the forward and reverse edges are kept as
+`idgraph.CSR` arrays. Traversals then ask
+the graph for importers instead of spawning ``rg`` for every visited node, so
+the subprocess count of a query is O(1) instead of O(nodes).
+
+It exposes the same query methods as `index.ImportIndex`, so it can be passed
+wherever an index is accepted (``--engine=graph``).
+"""
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import rg_runner
+from idgraph import CSR, Interner
+from parser import IMPORT_RE, PACKAGE_RE, PARSE_CACHE, parse_extends, parse_package_and_imports
+
+# a ripgrep (Rust regex) pattern matching the lines PACKAGE_RE/IMPORT_RE extract
+_HEADER_LINE_RG = r'^\s*(package|import)\s+[a-zA-Z_][a-zA-Z0-9_.]*\*?\s*;'
+
+
+class ImportGraph:
+    """Package, imports and reverse import edges of every `.java` file under root."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        # file ids index `keys`, which is sorted, so ascending ids are sorted keys
+        self.keys: List[str] = []
+        # ids of packages and imported names (FQNs, or packages for wildcards)
+        self.names = Interner()
+        self.pkg = array('i')  # file id -> package name id
+        self.imports = CSR(array('i', [0]), array('i'))  # file id -> imported name ids, in file order
+        # reverse edges: imported FQN -> importing files, wildcard package -> importing files
+        self.importers = CSR(array('i', [0]), array('i'))
+        self.wildcard_importers = CSR(array('i', [0]), array('i'))
+        self._files_memo: Dict[tuple, List[Path]] = {}
+        self._file_ids: Dict[str, int] = {}
+
+    @classmethod
+    def scan(cls, root: Path) -> 'ImportGraph':
+        graph = cls(root)
+        files = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)])
+        graph.keys = sorted(graph._key(f) for f in files)
+        file_ids = graph._file_ids = {key: i for i, key in enumerate(graph.keys)}
+        names = graph.names
+        no_pkg = names.id('')
+        graph.pkg = array('i', [no_pkg]) * len(graph.keys)
+        rows, cols = [], []
+        cmd = ['rg', '--json', '-g', '*.java', '-e', _HEADER_LINE_RG, str(root)]
+        for path, line in rg_runner.run_ripgrep_json(cmd):
+            f = file_ids.get(graph._key(path))
+            if f is None:
+                continue
+            m = IMPORT_RE.match(line)
+            if m:
+                rows.append(f)
+                cols.append(names.id(m.group(1)))
+                continue
+            m = PACKAGE_RE.match(line)
+            if m and graph.pkg[f] == no_pkg:
+                graph.pkg[f] = names.id(m.group(1))
+        graph._link(rows, cols)
+        return graph
+
+    def _link(self, rows: List[int], cols: List[int]) -> None:
+        """Set the forward edges (file id, name id) and derive the reverse ones."""
+        names = self.names
+        self.imports = CSR.from_pairs(len(self.keys), rows, cols)
+        # a wildcard import `a.b.*` is a reverse edge of package `a.b`
+        explicit = ([], [])
+        wildcard = ([], [])
+        for f in range(len(self.keys)):
+            for imp in self.imports.row(f):
+                name = names.name(imp)
+                if name.endswith('.*'):
+                    wildcard[0].append(names.id(name[:-2]))
+                    wildcard[1].append(f)
+                else:
+                    explicit[0].append(imp)
+                    explicit[1].append(f)
+        self.importers = CSR.from_pairs(len(names), *explicit)
+        self.wildcard_importers = CSR.from_pairs(len(names), *wildcard)
+
+    def _key(self, path: Path) -> str:
+        return rg_runner.relative_key(path, self.root)
+
+    # -- queries mirroring the ripgrep helpers ----------------------------
+
+    def all_files(self) -> List[Path]:
+        return [self.root / k for k in self.keys]
+
+    def run_rg_files(self, cfg=None) -> List[Path]:
+        globs = tuple(rg_runner.rg_files_globs(cfg))
+        if globs not in self._files_memo:
+            self._files_memo[globs] = rg_runner.select_files(self.root, self.keys, globs)
+        return list(self._files_memo[globs])
+
+    def get_files(self, files_cache=None, cfg=None) -> List[Path]:
+        return files_cache if files_cache is not None else self.run_rg_files(cfg)
+
+    def find_matches_for(
+        self,
+        cur: str,
+        cfg: dict | None,
+        files_cache: List[Path] | None = None,
+        sort_strategy: str | None = None,
+    ) -> List[Path]:
+        """Return files importing ``cur`` explicitly or through its package wildcard."""
+        cur_pkg = cur.rsplit('.', 1)[0] if '.' in cur else ''
+        ids = set(self.importers.row(self.names.get(cur)))
+        ids.update(self.wildcard_importers.row(self.names.get(cur_pkg)))
+        keys = [self.keys[i] for i in sorted(ids)]
+        matches = rg_runner.select_files(self.root, keys, rg_runner.rg_search_globs(cfg), files_cache)
+        if sort_strategy == 'lex':
+            matches = sorted(matches, key=lambda p: str(p))
+        return matches
+
+    def precompute_files_cache(self, cfg) -> List[Path] | None:
+        return rg_runner.precompute_files_cache(cfg, self.root)
+
+    def parse_package_and_imports(self, path: Path) -> Tuple[str, List[str], List[str]]:
+        # the scan has no class headers, so implements lists are parsed on
+        # demand (through the shared parse cache)
+        return parse_package_and_imports(path)
+
+    def parse_extends(self, path: Path) -> List[str]:
+        return list(parse_extends(path))
+
+    def package_of(self, path: Path) -> str:
+        i = self._file_ids.get(self._key(path))
+        return self.names.name(self.pkg[i]) if i is not None else PARSE_CACHE.get(path).pkg
+
+    def is_interface(self, path: Path) -> bool:
+        return PARSE_CACHE.get(path).kind == 'interface'
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""Compact integer-ID graph core.
+
+Names (FQNs, packages, file keys) are interned to dense ints once, and
+adjacency is kept in ``array('i')`` buffers instead of dicts, sets and tuples
+of strings, so a 100k-class graph costs a few bytes per edge. Strings are
+looked up again only when something is printed.
+
+- `Interner`: name <-> id
+- `CSR`: static adjacency in compressed sparse row form (`graph.ImportGraph`)
+- `EdgeList`: append-only ``(parent, level, child)`` triples, the traversal
+  results collected by `finder` and `java_dep_graph.reverse_dependants`
+- `ChildTree`: per-parent child lists packed as CSR, walked by
+  `renderer.Renderer.render_dfs`
+- `strongly_connected`/`Condensation`: import cycles collapsed to single
+  components, with the transitive dependents of every component computed
+  once over the resulting DAG (`blast`)
+"""
+from __future__ import annotations
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class Interner:
+    """Dense ids for names, in first-seen order."""
+
+    __slots__ = ('_ids', '_names')
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._ids: Dict[str, int] = {}
+        self._names: List[str] = []
+        for name in names:
+            self.id(name)
+
+    @classmethod
+    def from_unique(cls, names: List[str]) -> 'Interner':
+        """Interner over ``names`` (already distinct, e.g. a stored table) without re-interning each one."""
+        interner = cls()
+        interner._names = names
+        interner._ids = dict(zip(names, range(len(names))))
+        return interner
+
+    def id(self, name: str) -> int:
+        i = self._ids.get(name)
+        if i is None:
+            i = self._ids[name] = len(self._names)
+            self._names.append(name)
+        return i
+
+    def get(self, name: str, default: int = -1) -> int:
+        """Id of ``name`` without interning it."""
+        return self._ids.get(name, default)
+
+    def name(self, i: int) -> str:
+        return self._names[i]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[str]:
+        """Names in id order."""
+        return iter(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+
+class CSR:
+    """Compressed sparse rows: the columns of row ``i`` are ``cols[offsets[i]:offsets[i + 1]]``."""
+
+    __slots__ = ('offsets', 'cols')
+
+    def __init__(self, offsets: array, cols: array):
+        self.offsets = offsets
+        self.cols = cols
+
+    @classmethod
+    def from_pairs(cls, nrows: int, rows: Iterable[int], cols: Iterable[int]) -> 'CSR':
+        """Build from parallel row/column sequences; each row keeps its columns in input order."""
+        rows = array('i', rows)
+        cols = array('i', cols)
+        offsets = array('i', bytes(4 * (nrows + 1)))
+        for r in rows:
+            offsets[r + 1] += 1
+        for i in range(nrows):
+            offsets[i + 1] += offsets[i]
+        fill = array('i', offsets[:-1])
+        out = array('i', bytes(4 * len(cols)))
+        for r, c in zip(rows, cols):
+            out[fill[r]] = c
+            fill[r] += 1
+        return cls(offsets, out)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def row(self, i: int) -> array:
+        if i < 0 or i >= len(self):
+            return array('i')
+        return self.cols[self.offsets[i]:self.offsets[i + 1]]
+
+    def degree(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def transpose(self, ncols: int | None = None) -> 'CSR':
+        """Reverse every edge; rows of the result list their sources in ascending order."""
+        ncols = ncols if ncols is not None else (max(self.cols) + 1 if self.cols else 0)
+        rows = array('i')
+        for i in range(len(self)):
+            rows.extend([i] * self.degree(i))
+        return CSR.from_pairs(ncols, self.cols, rows)
+
+
+def strongly_connected(graph: CSR) -> Tuple[array, int]:
+    """Tarjan's strongly connected components, without recursion.
+
+    Returns ``(comp, count)`` where ``comp[v]`` is the component of node
+    ``v``. Components are numbered in the order they complete, so every edge
+    leads to a component with the same or a lower number.
+    """
+    n = len(graph)
+    offsets, cols = graph.offsets, graph.cols
+    order = array('i', [-1]) * n  # discovery index
+    low = array('i', [0]) * n
+    comp = array('i', [-1]) * n
+    on_stack = bytearray(n)
+    stack: List[int] = []
+    counter = count = 0
+    for start in range(n):
+        if order[start] != -1:
+            continue
+        order[start] = low[start] = counter
+        counter += 1
+        stack.append(start)
+        on_stack[start] = 1
+        work = [[start, offsets[start]]]  # node, next edge to follow
+        while work:
+            frame = work[-1]
+            v, i = frame
+            if i < offsets[v + 1]:
+                frame[1] = i + 1
+                w = cols[i]
+                if order[w] == -1:
+                    order[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = 1
+                    work.append([w, offsets[w]])
+                elif on_stack[w] and order[w] < low[v]:
+                    low[v] = order[w]
+                continue
+            work.pop()
+            if work and low[v] < low[work[-1][0]]:
+                low[work[-1][0]] = low[v]
+            if low[v] == order[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = 0
+                    comp[w] = count
+                    if w == v:
+                        break
+                count += 1
+    return comp, count
+
+
+class Condensation:
+    """The DAG of strongly connected components of a ``node -> imported node`` graph.
+
+    `dependents` answers "which nodes reach this one" for every node from
+    bitsets computed once per component, so cycles are never walked twice
+    and repeated queries cost a lookup.
+    """
+
+    __slots__ = ('comp', 'members', 'dag', '_reach')
+
+    def __init__(self, graph: CSR):
+        self.comp, count = strongly_connected(graph)
+        self.members = CSR.from_pairs(count, self.comp, range(len(graph)))  # component -> nodes, ascending
+        links = set()
+        for v in range(len(graph)):
+            cv = self.comp[v]
+            for w in graph.row(v):
+                if self.comp[w] != cv:
+                    links.add(pack(cv, self.comp[w]))
+        links = sorted(links)
+        self.dag = CSR.from_pairs(count, [k >> 32 for k in links], [k & 0xFFFFFFFF for k in links])
+        self._reach: List[int] | None = None
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def cycles(self) -> List[array]:
+        """Members of every component with more than one node, largest first."""
+        found = [self.members.row(c) for c in range(len(self)) if self.members.degree(c) > 1]
+        found.sort(key=lambda m: (-len(m), m[0]))
+        return found
+
+    def reach(self) -> List[int]:
+        """Per component, the bitset of its members and every node that reaches them (computed once)."""
+        if self._reach is None:
+            reach = [0] * len(self)
+            # importers complete after what they import: walk from the highest number down
+            for c in range(len(self) - 1, -1, -1):
+                bits = reach[c]
+                for v in self.members.row(c):
+                    bits |= 1 << v
+                reach[c] = bits
+                for d in self.dag.row(c):
+                    reach[d] |= bits
+            self._reach = reach
+        return self._reach
+
+    def dependents(self, v: int) -> int:
+        """Bitset of the nodes that reach ``v``: the rest of its cycle and everything above it."""
+        return self.reach()[self.comp[v]] & ~(1 << v)
+
+
+def pack(a: int, b: int) -> int:
+    """One int for the id pair ``(a, b)``, e.g. for sets of links."""
+    return (a << 32) | b
+
+
+class EdgeList:
+    """Append-only ``(parent, level, child)`` id triples, with per-edge deletion."""
+
+    __slots__ = ('parents', 'levels', 'children', '_deleted')
+
+    def __init__(self):
+        self.parents = array('i')
+        self.levels = array('i')
+        self.children = array('i')
+        self._deleted = bytearray()
+
+    def add(self, parent: int, level: int, child: int) -> None:
+        self.parents.append(parent)
+        self.levels.append(level)
+        self.children.append(child)
+        self._deleted.append(0)
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def edges(self, stop: int | None = None) -> Iterator[Tuple[int, int, int]]:
+        """Live ``(parent, level, child)`` triples among the first ``stop`` edges, in insertion order."""
+        stop = len(self) if stop is None else stop
+        for i in range(stop):
+            if not self._deleted[i]:
+                yield self.parents[i], self.levels[i], self.children[i]
+
+    def children_of(self, parent: int) -> List[Tuple[int, int]]:
+        """Live ``(level, child)`` pairs of ``parent``, in insertion order."""
+        return [(lvl, child) for p, lvl, child in self.edges() if p == parent]
+
+    def delete(self, parent: int, children) -> None:
+        """Delete the current edges from ``parent`` to any of ``children``."""
+        for i in range(len(self)):
+            if self.parents[i] == parent and self.children[i] in children:
+                self._deleted[i] = 1
+
+
+class ChildTree:
+    """Child lists per parent, CSR-packed, as rendered by `renderer.Renderer.render_dfs`.
+
+    ``levels[k]``/``children[k]`` for ``k`` in ``offsets[p]:offsets[p + 1]``
+    are the ``(level, child)`` entries of parent ``p``.
+    """
+
+    __slots__ = ('names', 'offsets', 'levels', 'children')
+
+    def __init__(self, names: Interner, offsets: array, levels: array, children: array):
+        self.names = names
+        self.offsets = offsets
+        self.levels = levels
+        self.children = children
+
+    @classmethod
+    def from_edges(cls, edges: EdgeList, names: Interner, sort_lex: bool = False) -> 'ChildTree':
+        """Group ``edges`` by parent, keeping the first edge to each child (lex-sorted if asked)."""
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        seen = set()
+        for parent, lvl, child in edges.edges():
+            key = pack(parent, child)
+            if key in seen:
+                continue
+            seen.add(key)
+            groups.setdefault(parent, []).append((lvl, child))
+        return cls._pack(groups, names, sort_lex)
+
+    @classmethod
+    def from_dict(cls, children: Dict[str, List[Tuple[int, str]]], names: Interner | None = None) -> 'ChildTree':
+        """Pack a ``{parent: [(level, child), ...]}`` dict as is."""
+        names = names if names is not None else Interner()
+        groups = {names.id(p): [(lvl, names.id(c)) for lvl, c in lst] for p, lst in children.items()}
+        return cls._pack(groups, names, False)
+
+    @classmethod
+    def _pack(cls, groups, names: Interner, sort_lex: bool) -> 'ChildTree':
+        offsets = array('i', bytes(4 * (len(names) + 1)))
+        levels = array('i')
+        kids = array('i')
+        for parent in range(len(names)):
+            lst = groups.get(parent, ())
+            if sort_lex:
+                lst = sorted(lst, key=lambda t: names.name(t[1]))
+            for lvl, child in lst:
+                levels.append(lvl)
+                kids.append(child)
+            offsets[parent + 1] = len(kids)
+        return cls(names, offsets, levels, kids)
+
+    def get(self, parent: int) -> Iterator[Tuple[int, int]]:
+        if parent < 0 or parent + 1 >= len(self.offsets):
+            return iter(())
+        start, end = self.offsets[parent], self.offsets[parent + 1]
+        return zip(self.levels[start:end], self.children[start:end])
+
+    def child_ids(self) -> set:
+        return set(self.children)
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""Persistent on-disk reverse-import index.
+
+Every Java file under the root is parsed once with
+`parser.parse_package_and_imports` and stored in a SQLite database kept in a
+hidden cache directory inside the root. Reverse queries (who imports ``X``)
+are then answered with indexed lookups instead of one ripgrep process per
+visited node.
+
+`ImportIndex.refresh` keeps the index current without a full rescan: it asks
+git which files changed since the last refresh (or, outside a git work tree,
+compares stored ``(mtime_ns, size)`` fingerprints) and re-parses only those.
+
+The query methods mirror the ripgrep-backed helpers they replace
+(`rg_runner.run_rg_files`, `finder.find_matches_for`,
+`rg_runner.precompute_files_cache` and `parser.parse_package_and_imports`) so
+traversal code can switch between the two without changing its output.
+"""
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import subprocess
+from pathlib import Path
+from typing import List, Tuple
+
+import rg_runner
+from parser import PARSE_CACHE, parse_extends, parse_file, parse_package_and_imports, resolve_types
+
+INDEX_DIRNAME = '.java-dep-graph'
+INDEX_FILENAME = 'index.sqlite3'
+SCHEMA_VERSION = 6
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE classes (
+    path TEXT PRIMARY KEY,
+    fqn TEXT NOT NULL,
+    pkg TEXT NOT NULL,
+    is_interface INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX classes_by_fqn ON classes(fqn);
+-- one row per import line, in file order; `target` is the imported FQN or,
+-- for wildcard imports, the imported package
+CREATE TABLE imports (
+    path TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    target TEXT NOT NULL,
+    wildcard INTEGER NOT NULL
+);
+CREATE INDEX imports_by_path ON imports(path);
+CREATE INDEX imports_by_target ON imports(target, wildcard);
+CREATE TABLE implements (
+    path TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX implements_by_path ON implements(path);
+CREATE INDEX implements_by_name ON implements(name);
+CREATE TABLE extends (
+    path TEXT NOT NULL,
+    pos INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX extends_by_path ON extends(path);
+"""
+
+
+def default_index_path(root: Path) -> Path:
+    return Path(root) / INDEX_DIRNAME / INDEX_FILENAME
+
+
+def _fingerprint(path: Path) -> Tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _git(root: Path, *args: str) -> List[str] | None:
+    """Run a git command in ``root``; return its output lines or None on failure."""
+    try:
+        p = subprocess.run(['git', '-C', str(root), *args], capture_output=True, text=True)
+    except OSError:
+        return None
+    if p.returncode != 0:
+        return None
+    return [x for x in p.stdout.splitlines() if x.strip()]
+
+
+class ImportIndex:
+    """SQLite-backed class/import index for one source root."""
+
+    def __init__(self, root: Path, conn: sqlite3.Connection, path: Path | None = None):
+        self.root = Path(root)
+        self.conn = conn
+        self.path = path
+        self._files_memo = {}
+
+    # -- construction -----------------------------------------------------
+
+    @classmethod
+    def open(cls, root: Path, path: Path | None = None) -> 'ImportIndex':
+        """Open the index for ``root``, building it when missing or outdated."""
+        path = Path(path) if path else default_index_path(root)
+        if path.exists():
+            conn = sqlite3.connect(str(path))
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            except sqlite3.DatabaseError:
+                row = None
+            if row and row[0] == str(SCHEMA_VERSION):
+                return cls(root, conn, path)
+            conn.close()
+        return cls.build(root, path)
+
+    @classmethod
+    def build(cls, root: Path, path: Path | None = None) -> 'ImportIndex':
+        """(Re)build the index from scratch by parsing every `.java` file once."""
+        path = Path(path) if path else default_index_path(root)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # keep the cache out of version control, like pytest's .pytest_cache
+        gitignore = path.parent / '.gitignore'
+        if not gitignore.exists():
+            gitignore.write_text('*\n')
+        tmp = path.with_name(path.name + '.tmp')
+        if tmp.exists():
+            tmp.unlink()
+        conn = sqlite3.connect(str(tmp))
+        conn.executescript(_SCHEMA)
+        conn.execute("INSERT INTO meta VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        index = cls(root, conn)
+        files = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)])
+        with conn:
+            for f in files:
+                index._insert_file(f)
+            index._record_git_state()
+        conn.close()
+        os.replace(tmp, path)
+        return cls(root, sqlite3.connect(str(path)), path)
+
+    def to_memory(self) -> 'ImportIndex':
+        """Copy of this index in an in-memory database, for long-running processes.
+
+        Refreshes of the copy are not written back to disk.
+        """
+        conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.conn.backup(conn)
+        return ImportIndex(self.root, conn)
+
+    def _insert_file(self, f: Path) -> None:
+        fp = _fingerprint(f)
+        if fp is None:
+            return
+        record = parse_file(f)
+        pkg, imports, implements = record.pkg, record.imports, record.implements
+        is_interface = record.kind == 'interface'
+        key = self._key(f)
+        fqn = f'{pkg}.{f.stem}' if pkg else f.stem
+        self.conn.execute('INSERT INTO classes VALUES (?, ?, ?, ?, ?, ?)', (key, fqn, pkg, int(is_interface), *fp))
+        self.conn.executemany(
+            'INSERT INTO imports VALUES (?, ?, ?, ?, ?)',
+            [(key, i, imp, imp[:-2] if imp.endswith('.*') else imp, int(imp.endswith('.*')))
+             for i, imp in enumerate(imports)],
+        )
+        self.conn.executemany(
+            'INSERT INTO implements VALUES (?, ?, ?)',
+            [(key, i, name) for i, name in enumerate(implements)],
+        )
+        self.conn.executemany(
+            'INSERT INTO extends VALUES (?, ?, ?)',
+            [(key, i, name) for i, name in enumerate(record.extends)],
+        )
+
+    def _delete_file(self, key: str) -> None:
+        for table in ('classes', 'imports', 'implements', 'extends'):
+            self.conn.execute(f'DELETE FROM {table} WHERE path = ?', (key,))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # -- incremental refresh ----------------------------------------------
+
+    def _meta(self, key: str) -> str | None:
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self.conn.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (key, value))
+
+    def _git_dirty(self) -> List[str] | None:
+        """Paths (relative to root) that differ from HEAD, including untracked ones."""
+        changed = _git(self.root, 'diff', '--name-only', '--no-renames', '--relative', 'HEAD')
+        untracked = _git(self.root, 'ls-files', '--others', '--exclude-standard')
+        if changed is None or untracked is None:
+            return None
+        return changed + untracked
+
+    def _record_git_state(self) -> None:
+        head = _git(self.root, 'rev-parse', 'HEAD')
+        dirty = self._git_dirty() if head else None
+        if not head or dirty is None:
+            self.conn.execute("DELETE FROM meta WHERE key IN ('git_head', 'git_dirty')")
+            return
+        self._set_meta('git_head', head[0])
+        self._set_meta('git_dirty', '\n'.join(dirty))
+
+    def _git_candidates(self) -> List[str] | None:
+        """Files that may have changed since the last refresh, according to git.
+
+        That is everything committed since the recorded HEAD, everything
+        currently dirty and everything that was dirty last time (it may have
+        been reverted since). Returns None when git cannot answer.
+        """
+        old_head = self._meta('git_head')
+        if not old_head:
+            return None
+        committed = _git(self.root, 'diff', '--name-only', '--no-renames', '--relative', old_head, 'HEAD')
+        dirty = self._git_dirty()
+        if committed is None or dirty is None:
+            return None
+        previously_dirty = (self._meta('git_dirty') or '').splitlines()
+        return sorted(set(committed) | set(dirty) | set(previously_dirty))
+
+    def refresh(self) -> dict:
+        """Re-parse only added, changed or deleted `.java` files, in place.
+
+        Returns counts of ``added``, ``updated`` and ``removed`` files plus the
+        ``mode`` used to find them (``git`` or ``fingerprint``).
+        """
+        stored = {k: (m, s) for k, m, s in self.conn.execute('SELECT path, mtime_ns, size FROM classes')}
+        candidates = self._git_candidates()
+        mode = 'git'
+        if candidates is None:
+            mode = 'fingerprint'
+            current = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(self.root)])
+            candidates = sorted(set(stored) | {self._key(f) for f in current})
+        else:
+            # ripgrep skips hidden files and directories; keep the index consistent
+            candidates = [k for k in candidates
+                          if k.endswith('.java') and not any(part.startswith('.') for part in k.split('/'))]
+        stats = {'mode': mode, 'added': 0, 'updated': 0, 'removed': 0}
+        with self.conn:
+            for key in candidates:
+                fp = _fingerprint(self._path(key))
+                old = stored.get(key)
+                if fp == old:
+                    continue
+                self._delete_file(key)
+                if fp is None:
+                    stats['removed'] += 1
+                    continue
+                self._insert_file(self._path(key))
+                stats['updated' if old else 'added'] += 1
+            self._record_git_state()
+        if stats['added'] or stats['removed']:
+            self._files_memo.clear()
+        return stats
+
+    # -- path helpers -----------------------------------------------------
+
+    def _key(self, path: Path) -> str:
+        return rg_runner.relative_key(path, self.root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def _select(self, keys, globs, files_cache=None) -> List[Path]:
+        return rg_runner.select_files(self.root, keys, globs, files_cache)
+
+    # -- queries mirroring the ripgrep helpers ----------------------------
+
+    def all_files(self) -> List[Path]:
+        """Every indexed file, like `rg --files -g *.java <root>`."""
+        return [self._path(k) for (k,) in self.conn.execute('SELECT path FROM classes ORDER BY path')]
+
+    def run_rg_files(self, cfg=None) -> List[Path]:
+        globs = tuple(rg_runner.rg_files_globs(cfg))
+        if globs not in self._files_memo:
+            keys = [k for (k,) in self.conn.execute('SELECT path FROM classes ORDER BY path')]
+            self._files_memo[globs] = self._select(keys, globs)
+        return list(self._files_memo[globs])
+
+    def get_files(self, files_cache=None, cfg=None) -> List[Path]:
+        return files_cache if files_cache is not None else self.run_rg_files(cfg)
+
+    def find_matches_for(
+        self,
+        cur: str,
+        cfg: dict | None,
+        files_cache: List[Path] | None = None,
+        sort_strategy: str | None = None,
+    ) -> List[Path]:
+        """Return files importing ``cur`` explicitly or through its package wildcard."""
+        cur_pkg = cur.rsplit('.', 1)[0] if '.' in cur else ''
+        rows = self.conn.execute(
+            'SELECT DISTINCT path FROM imports WHERE (target = ? AND wildcard = 0) OR (target = ? AND wildcard = 1)',
+            (cur, cur_pkg),
+        )
+        keys = [k for (k,) in rows]
+        matches = self._select(keys, rg_runner.rg_search_globs(cfg), files_cache)
+        if sort_strategy == 'lex':
+            matches = sorted(matches, key=lambda p: str(p))
+        return matches
+
+    def precompute_files_cache(self, cfg) -> List[Path] | None:
+        include_pat = cfg.get('import_include_patterns') or cfg.get('whitelist_regex')
+        if not include_pat:
+            return None
+        try:
+            pattern = re.compile(rf'^package\s+{include_pat}')
+        except re.error:
+            return None
+        res = [self._path(k) for k, pkg in self.conn.execute('SELECT path, pkg FROM classes ORDER BY path')
+               if pkg and pattern.search(f'package {pkg};')]
+        return res if res else None
+
+    def parse_package_and_imports(self, path: Path) -> Tuple[str, List[str], List[str]]:
+        """Stored equivalent of `parser.parse_package_and_imports`."""
+        key = self._key(path)
+        row = self.conn.execute('SELECT pkg FROM classes WHERE path = ?', (key,)).fetchone()
+        if row is None:
+            # not indexed (e.g. created after the last build): parse directly
+            return parse_package_and_imports(path)
+        imports = [n for (n,) in self.conn.execute('SELECT name FROM imports WHERE path = ? ORDER BY pos', (key,))]
+        implements = [n for (n,) in self.conn.execute('SELECT name FROM implements WHERE path = ? ORDER BY pos', (key,))]
+        # stored as written when the file alone cannot qualify them
+        return row[0], imports, list(resolve_types(implements, row[0], imports))
+
+    def parse_extends(self, path: Path) -> List[str]:
+        """Stored equivalent of `parser.parse_extends`."""
+        key = self._key(path)
+        row = self.conn.execute('SELECT pkg FROM classes WHERE path = ?', (key,)).fetchone()
+        if row is None:
+            return list(parse_extends(path))
+        imports = [n for (n,) in self.conn.execute('SELECT name FROM imports WHERE path = ? ORDER BY pos', (key,))]
+        extends = [n for (n,) in self.conn.execute('SELECT name FROM extends WHERE path = ? ORDER BY pos', (key,))]
+        return list(resolve_types(extends, row[0], imports))
+
+    def package_of(self, path: Path) -> str:
+        row = self.conn.execute('SELECT pkg FROM classes WHERE path = ?', (self._key(path),)).fetchone()
+        return row[0] if row is not None else PARSE_CACHE.get(path).pkg
+
+    def is_interface(self, path: Path) -> bool:
+        row = self.conn.execute('SELECT is_interface FROM classes WHERE path = ?', (self._key(path),)).fetchone()
+        if row is None:
+            return PARSE_CACHE.get(path).kind == 'interface'
+        return bool(row[0])
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
 import argparse
+import contextlib
+import io
+import json
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from renderer import Renderer
 import rg_runner
 import parser
 import finder
+from index import ImportIndex
+from graph import ImportGraph
+from idgraph import ChildTree, EdgeList, Interner, pack
+from locator import ClassLocator
+from snapshot import GraphSnapshot
+import blast
+import impact
+import daemon
+import profiler
+import refscan
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 
@@ -26,7 +41,9 @@ def load_config():
         'ripgrep_include_patterns': [],
         'ripgrep_exclude_patterns': [],
         'render_exclude_patterns': '',
-        'render_include_patterns': ''
+        'render_include_patterns': '',
+        'rg_concurrency': 1,
+        'scan_backend': 'auto'
     }
     cwd_cfg = Path.cwd() / 'java-dep-graph.conf'
     script_cfg = SCRIPT_DIR / 'java-dep-graph.conf'
@@ -55,6 +72,19 @@ def load_config():
                 # comma-separated list of ripgrep glob patterns, e.g. !**/test/**,!**/src/test/**
                 val = line.split('=',1)[1]
                 cfg['ripgrep_exclude_patterns'] = [v.strip() for v in val.split(',') if v.strip()]
+            elif line.startswith('rg_concurrency='):
+                # ripgrep searches kept in flight by the rg-per-node engine
+                try:
+                    cfg['rg_concurrency'] = max(1, int(line.split('=',1)[1]))
+                except ValueError:
+                    log('Ignoring invalid rg_concurrency:', line.split('=',1)[1])
+            elif line.startswith('scan_backend='):
+                # what lists and searches the tree: rg, native (in-process) or auto (rg if installed)
+                val = line.split('=',1)[1].strip()
+                if val in rg_runner.SCAN_BACKENDS:
+                    cfg['scan_backend'] = val
+                else:
+                    log('Ignoring invalid scan_backend:', val)
         if cfg['import_include_patterns']:
             log('Loaded import include patterns:', cfg['import_include_patterns'])
         if cfg['import_exclude_patterns']:
@@ -85,16 +115,42 @@ def build_rg_exclude_args(cfg=None):
 
 # traversal helpers moved to `finder`.
 
-def generate_dot(root, cfg):
-    files = rg_runner.run_rg_files(root)
+def _dot_edges(files, include, exclude):
+    """(package, import) edges of ``files``; runs in worker processes for --jobs."""
+    accept = parser.ImportFilter(include, exclude)
     edges = set()
     for f in files:
-        pkg, imports, _ = parser.parse_package_and_imports(f)
-        if not pkg:
+        record = parser.parse_file(f)
+        if not record.pkg:
             continue
-        for imp in imports:
-            if parser.apply_filters(imp, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
-                edges.add((pkg, imp))
+        for imp in record.imports:
+            if accept(imp):
+                edges.add((record.pkg, imp))
+    return edges
+
+
+def generate_dot(root, cfg, jobs=1, index=None):
+    files = index.run_rg_files() if index is not None else rg_runner.run_rg_files(root)
+    include = cfg.get('import_include_patterns') or cfg.get('whitelist_regex')
+    exclude = cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')
+    if index is not None:
+        # already parsed: read the stored headers instead of the files
+        accept = parser.import_filter(cfg)
+        edges = set()
+        for f in files:
+            pkg, imports, _ = index.parse_package_and_imports(f)
+            if pkg:
+                edges.update((pkg, imp) for imp in imports if accept(imp))
+    elif jobs > 1 and len(files) > 1:
+        # a few chunks per worker keeps the pool busy without per-file IPC overhead
+        chunk = max(1, min(2000, -(-len(files) // (jobs * 4))))
+        chunks = [files[i:i + chunk] for i in range(0, len(files), chunk)]
+        edges = set()
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for part in pool.map(_dot_edges, chunks, repeat(include), repeat(exclude)):
+                edges |= part
+    else:
+        edges = _dot_edges(files, include, exclude)
     print('digraph Dependencies {')
     print('  node [shape=box, style=filled, color="#E8E8E8"];')
     for a,b in sorted(edges):
@@ -104,239 +160,600 @@ def generate_dot(root, cfg):
 
 
 
-def find_class_file(root, target, files_cache=None, cfg=None):
-    # target can be simple or fully-qualified
-    if '.' in target:
-        # try to find file by FQN path
-        parts = target.split('.')
-        cls = parts[-1]
-        candidates = rg_runner.get_files(root, files_cache, cfg)
-        for c in candidates:
-            if c.name == cls + '.java':
-                # check package
-                pkg, _ = parser.parse_package_and_imports(c)
-                if pkg == '.'.join(parts[:-1]):
-                    return c
-        return None
-    else:
-        candidates = [p for p in rg_runner.get_files(root, files_cache, cfg) if p.name == target + '.java']
-        return candidates[0] if candidates else None
+def find_class_file(root, target, files_cache=None, cfg=None, index=None, locator=None):
+    # target can be simple or fully-qualified; lookups go through a
+    # `locator.ClassLocator` (pass one in to share it across calls)
+    if locator is None:
+        locator = ClassLocator.build(root, cfg, files_cache, index)
+    return locator.find(target)
+
 
-def list_imports_of_class(root, target, cfg, files_cache=None):
-    file = find_class_file(root, target, files_cache=files_cache, cfg=cfg)
+def list_imports_of_class(root, target, cfg, files_cache=None, index=None):
+    file = find_class_file(root, target, files_cache=files_cache, cfg=cfg, index=index)
     if not file:
         log(f"Error: class file {target}.java not found under '{root}'.")
         sys.exit(1)
     log('Inspecting imports in:', str(file))
-    _, imports, _ = parser.parse_package_and_imports(file)
-    filtered = [imp for imp in sorted(set(imports)) if parser.apply_filters(imp, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex'))]
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    _, imports, _ = parse(file)
+    accept = parser.import_filter(cfg)
+    filtered = [imp for imp in sorted(set(imports)) if accept(imp)]
     for imp in filtered:
         print(imp)
 
-def reverse_dependants(root, target_fqn, cfg, levels=0, sort_strategy=None, search='BFS', files_cache=None):
+def reverse_dependants(root, target_fqn, cfg, levels=0, sort_strategy=None, search='BFS', files_cache=None, index=None, batched=False,
+                       memo=None, locator=None, implicit=None):
     # delegate traversal to specific BFS/DFS helper preserving existing behavior
     # Use DFS traversal only (BFS support removed).
-    results = finder.traverse_reverse_dfs(root, target_fqn, cfg, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache)
-
-    # build adjacency map parent -> [children] from recorded triples
-    children = {}
+    # With an `index.ImportIndex`/`graph.ImportGraph` every lookup below is answered from it.
+    # The target and every promoted interface/implementation in `top_extras` share one
+    # `finder.DependentsMemo`, so overlapping subtrees are searched and parsed once.
+    # `memo` and `locator` may also be shared by several calls with the same
+    # cfg/files_cache/sort_strategy (see `reverse_batch`).
+    # With `implicit` (a `refscan.ImplicitRefs`) same-package and fully-qualified
+    # references count as dependents too (--implicit-refs).
+    if memo is None:
+        memo = finder.DependentsMemo()
+    parse_header = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    def parse(path):
+        return memo.parse(path, parse_header)
+    accept = parser.import_filter(cfg)
+    profiler.mark('traversal')
+    # FQNs are interned once; edges and links below are ids (see `idgraph`)
+    names = Interner()
+    target = names.id(target_fqn)
+    results = finder.traverse_reverse_ids(root, target_fqn, cfg, names, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache, index=index, batched=batched, memo=memo, implicit=implicit)
+
+    # build parent -> child edges from the recorded ones
+    children = EdgeList()
     seen_links = set()
-    for lvl, dep, parent in results:
+    for parent, lvl, dep in results.edges():
         # skip self-links where parent == dep
         if parent == dep:
             continue
-        link = (parent, dep)
+        link = pack(parent, dep)
         if link in seen_links:
             continue
         seen_links.add(link)
-        children.setdefault(parent, []).append((lvl, dep))
+        children.add(parent, lvl, dep)
 
     # If the initial target is a concrete class that implements/extends interfaces,
     # collect those interfaces as `top_extras` so they are printed as separate
     # top-level entries (not as children of the target). Also gather their
     # reverse dependents so the interface is treated as a target too.
     # If the target itself is an interface, find its implementations and add them as siblings.
+    # one locator serves every class-file lookup of this run
+    if locator is None:
+        locator = ClassLocator.build(root, cfg, files_cache, index)
     target_simple = target_fqn.split('.')[-1]
-    target_file = find_class_file(root, target_simple, files_cache=files_cache, cfg=cfg)
+    target_file = find_class_file(root, target_simple, locator=locator)
     # fallback: search all java files (ignore include_globs) to locate the class file
     if not target_file:
-        try:
-            all_files = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)])
-            for f in all_files:
-                if f.name == target_simple + '.java':
-                    pkg_try, _, _ = parser.parse_package_and_imports(f)
-                    if pkg_try == '.'.join(target_fqn.split('.')[:-1]):
-                        target_file = f
-                        break
-        except Exception:
-            target_file = None
+        target_file = locator.find_fqn(target_fqn, secondary=True)
     top_extras = []
     if target_file:
-        pkg, imports, implements = parser.parse_package_and_imports(target_file)
+        pkg, imports, implements = parse(target_file)
         
-        # Check if target is an interface (no 'implements' clause, but is an interface)
-        is_interface = 'interface' in open(target_file, 'r', encoding='utf-8', errors='ignore').read()
+        # Check if target is an interface (declared as `interface`, per its parsed header)
+        if index is not None:
+            is_interface = index.is_interface(target_file)
+        else:
+            is_interface = parser.PARSE_CACHE.get(target_file).kind == 'interface'
         
         if is_interface:
             # Target is an interface - promote any dependents that implement it to top_extras (siblings)
             promoted_impls = []
-            for lvl, dep in list(children.get(target_fqn, [])):
-                dep_file = find_class_file(root, dep.split('.')[-1], files_cache=files_cache, cfg=cfg)
+            for lvl, dep in children.children_of(target):
+                dep_name = names.name(dep)
+                dep_file = find_class_file(root, dep_name.split('.')[-1], locator=locator)
                 if not dep_file:
                     continue
-                _, _, dep_implements = parser.parse_package_and_imports(dep_file)
+                _, _, dep_implements = parse(dep_file)
                 if target_fqn not in dep_implements:
                     continue
-                if not parser.apply_filters(dep, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                if not accept(dep_name):
                     continue
                 promoted_impls.append(dep)
-                if dep not in top_extras:
-                    top_extras.append(dep)
-                children.setdefault(dep, [])
-                extra = finder.traverse_reverse_dfs(root, dep, cfg, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache)
-                for extra_lvl, extra_dep, extra_parent in extra:
+                if dep_name not in top_extras:
+                    top_extras.append(dep_name)
+                extra = finder.traverse_reverse_ids(root, dep_name, cfg, names, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache, index=index, batched=batched, memo=memo, implicit=implicit)
+                for extra_parent, extra_lvl, extra_dep in extra.edges():
                     if extra_parent == extra_dep:
                         continue
-                    link = (extra_parent, extra_dep)
+                    link = pack(extra_parent, extra_dep)
                     if link in seen_links:
                         continue
                     seen_links.add(link)
-                    children.setdefault(extra_parent, []).append((extra_lvl, extra_dep))
-            if promoted_impls and target_fqn in children:
-                children[target_fqn] = [(lvl, dep) for lvl, dep in children[target_fqn] if dep not in promoted_impls]
+                    children.add(extra_parent, extra_lvl, extra_dep)
+            if promoted_impls:
+                children.delete(target, set(promoted_impls))
         else:
             # Target is a concrete class - promote only implemented interfaces to top_extras
             for rel in implements:
-                if parser.apply_filters(rel, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
+                if accept(rel):
                     # promote the interface to top_extras instead of making it a child
                     if rel not in top_extras:
                         top_extras.append(rel)
-                    children.setdefault(rel, [])
                     # run reverse traversal for the interface and merge results
                     # Always use DFS for extra traversal
-                    extra = finder.traverse_reverse_dfs(root, rel, cfg, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache)
-                    for lvl, dep, parent in extra:
+                    extra = finder.traverse_reverse_ids(root, rel, cfg, names, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache, index=index, batched=batched, memo=memo, implicit=implicit)
+                    for parent, lvl, dep in extra.edges():
                         # skip self-links
                         if parent == dep:
                             continue
-                        link = (parent, dep)
+                        link = pack(parent, dep)
                     if link in seen_links:
                         continue
                     seen_links.add(link)
-                    children.setdefault(parent, []).append((lvl, dep))
+                    children.add(parent, lvl, dep)
 
+    profiler.mark('sibling expansion')
     # For every parent -> child occurrence in `children`, add the child's
     # implements/extends types as siblings under the same parent. Iterate over
-    # a snapshot of `children.items()` to avoid mutation issues while adding
-    # new sibling entries.
-    for parent, child_list in list(children.items()):
-        for lvl, dep in list(child_list):
-            # find class file for dep (use fallback to full scan if needed)
-            dep_simple = dep.split('.')[-1]
-            dep_file = find_class_file(root, dep_simple, files_cache=files_cache, cfg=cfg)
-            if not dep_file:
-                try:
-                    all_files = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)])
-                    for f in all_files:
-                        if f.name == dep_simple + '.java':
-                            pkg_try, _, _ = parser.parse_package_and_imports(f)
-                            if pkg_try == '.'.join(dep.split('.')[:-1]):
-                                dep_file = f
-                                break
-                except Exception:
-                    dep_file = None
-            if not dep_file:
+    # a snapshot of the edges to avoid mutation issues while adding new
+    # sibling entries.
+    for parent, lvl, dep in list(children.edges()):
+        # find class file for dep (use fallback to full scan if needed)
+        dep_name = names.name(dep)
+        dep_simple = dep_name.split('.')[-1]
+        dep_file = find_class_file(root, dep_simple, locator=locator)
+        if not dep_file:
+            dep_file = locator.find_fqn(dep_name, secondary=True)
+        if not dep_file:
+            continue
+        _, _, implements = parse(dep_file)
+        for rel_name in implements:
+            if not accept(rel_name):
                 continue
-            _, _, implements = parser.parse_package_and_imports(dep_file)
-            for rel in implements:
-                if not parser.apply_filters(rel, cfg.get('import_include_patterns') or cfg.get('whitelist_regex'), cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex')):
-                    continue
-                # avoid self-links and duplicates; add as sibling under same parent
-                if parent == rel or dep == rel:
-                    continue
-                link = (parent, rel)
-                if link in seen_links:
-                    continue
-                seen_links.add(link)
-                children.setdefault(parent, []).append((lvl, rel))
-
-    # apply sorting to children lists only when lexicographic sorting requested
-    # also deduplicate children lists by dep to remove any accidental repeats
-    for p in list(children.keys()):
-        seen_deps = set()
-        new_lst = []
-        for lvl, dep in children.get(p, []):
-            if dep in seen_deps:
+            rel = names.id(rel_name)
+            # avoid self-links and duplicates; add as sibling under same parent
+            if parent == rel or dep == rel:
+                continue
+            link = pack(parent, rel)
+            if link in seen_links:
                 continue
-            seen_deps.add(dep)
-            new_lst.append((lvl, dep))
-        children[p] = new_lst
+            seen_links.add(link)
+            children.add(parent, lvl, rel)
 
-    if sort_strategy == 'lex':
-        for p in children:
-            children[p].sort(key=lambda t: t[1])
+    # group children per parent, deduplicated by dep to remove any accidental
+    # repeats and sorted only when lexicographic sorting is requested
+    tree = ChildTree.from_edges(children, names, sort_lex=(sort_strategy == 'lex'))
 
     # output: first line should be the target class (no leading spaces)
+    profiler.mark('render')
     renderer = Renderer(cfg.get('render_exclude_patterns'), cfg.get('render_include_patterns'))
     # Render using DFS only (BFS rendering removed).
-    printed = renderer.render_dfs(children, target_fqn, top_extras=top_extras, allow_impl_pairs=True)
+    printed = renderer.render_dfs(tree, target_fqn, top_extras=top_extras, allow_impl_pairs=True)
 
     # final count: number of printed dependency lines, excluding top-level extras
     top_count = len(top_extras) if 'top_extras' in locals() and top_extras else 0
     final_count = printed - top_count
     print(f'Dependents found: {final_count}')
+    return final_count
+
+
+def forward_dependencies(root, target_fqn, cfg, levels=0, sort_strategy=None, files_cache=None, index=None, locator=None):
+    # mirror of reverse_dependants: what the target imports, transitively, as a
+    # DFS tree; every imported FQN is resolved through one `ClassLocator`
+    if locator is None:
+        locator = ClassLocator.build(root, cfg, files_cache, index)
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    parse_extends = index.parse_extends if index is not None else parser.parse_extends
+    profiler.mark('traversal')
+    names = Interner()
+    edges = finder.traverse_forward_ids(target_fqn, cfg, names, locator, parse, levels=levels, sort_strategy=sort_strategy,
+                                        parse_extends=parse_extends)
+    tree = ChildTree.from_edges(edges, names, sort_lex=(sort_strategy == 'lex'))
+    profiler.mark('render')
+    renderer = Renderer(cfg.get('render_exclude_patterns'), cfg.get('render_include_patterns'))
+    printed = renderer.render_dfs(tree, target_fqn, allow_impl_pairs=True)
+    print(f'Dependencies found: {printed}')
+    return printed
+
+
+def all_blast_radius(root, cfg, out, levels=0, index=None):
+    """Write the transitive dependent count of every class to ``out`` ('-' is stdout); JSON for a .json path, else CSV.
+
+    ``out`` '-.json' prints JSON to stdout.
+    """
+    files = index.run_rg_files(cfg) if index is not None else rg_runner.run_rg_files(root, cfg)
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    parse_extends = index.parse_extends if index is not None else parser.parse_extends
+    names, imports = blast.class_graph(files, parse, cfg, parse_extends)
+    counts, direct = blast.blast_radius(imports, levels=levels)
+    text = blast.format_report(blast.report(names, counts, direct), 'json' if out.endswith('.json') else 'csv')
+    if out in ('-', '-.json'):
+        sys.stdout.write(text)
+    else:
+        Path(out).write_text(text, encoding='utf-8')
+        log('Blast radius written to:', out)
+
+
+def import_cycles(root, cfg, limit=10, index=None):
+    """Print the ``limit`` largest import cycles (all if 0) and their classes."""
+    files = index.run_rg_files(cfg) if index is not None else rg_runner.run_rg_files(root, cfg)
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    parse_extends = index.parse_extends if index is not None else parser.parse_extends
+    names, imports = blast.class_graph(files, parse, cfg, parse_extends)
+    found = blast.cycles(names, imports)
+    sys.stdout.write(blast.format_cycles(found, limit))
+    return len(found)
+
+
+def impact_analysis(root, rev_range, cfg, levels=0, index=None, implicit_refs=False, jsonl=False):
+    """Print the classes affected by the changes in ``rev_range`` and the changed class behind each."""
+    profiler.mark('changed classes')
+    try:
+        changed = impact.changed_classes(root, rev_range)
+    except ValueError as e:
+        log(f'Error: {e}')
+        sys.exit(1)
+    log(f'Changed classes: {len(changed)}')
+    if index is None:
+        # one scan answers every lookup of the traversal instead of one rg call per node
+        profiler.mark('engine setup')
+        index = ImportGraph.scan(root)
+    files_cache = index.precompute_files_cache(cfg)
+    implicit = build_implicit_refs(root, cfg, files_cache, index) if implicit_refs else None
+    profiler.mark('traversal')
+    found = impact.affected(changed, index, cfg, levels=levels, files_cache=files_cache, implicit=implicit)
+    if jsonl:
+        for fqn in sorted(found):
+            cause, level = found[fqn]
+            print(json.dumps({'class': fqn, 'cause': cause, 'level': level}))
+    else:
+        for line in impact.format_lines(found):
+            print(line)
+    affected = len(found) - len(changed)
+    print(f'Affected classes: {affected}')
+    return affected
+
+
+def build_implicit_refs(root, cfg, files_cache=None, index=None):
+    """`refscan.ImplicitRefs` over the files dependents are searched in (--implicit-refs)."""
+    profiler.mark('implicit refs')
+    files = index.get_files(files_cache, cfg) if index is not None else rg_runner.get_files(root, files_cache, cfg)
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    return refscan.ImplicitRefs.build(files, parse)
+
+
+def resolve_target_fqn(root, target, index=None, locator=None):
+    """FQN of ``target``; a simple name is qualified with the package of its class file (None if not found)."""
+    if '.' in target:
+        return target
+    file = find_class_file(root, target, index=index, locator=locator)
+    if not file:
+        return None
+    parse = index.parse_package_and_imports if index is not None else parser.parse_package_and_imports
+    pkg, _, _ = parse(file)
+    return f"{pkg}.{target}" if pkg else target
+
+
+def read_targets(path):
+    """Targets listed one per line in ``path`` ('-' reads stdin); blank lines and # comments are skipped."""
+    try:
+        text = sys.stdin.read() if path == '-' else Path(path).read_text()
+    except (OSError, UnicodeDecodeError) as e:
+        log(f'Error: cannot read targets from {path}: {e}')
+        sys.exit(1)
+    targets = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if line:
+            targets.append(line)
+    return targets
+
+
+def reverse_batch(root, targets, cfg, levels=0, sort_strategy=None, files_cache=None, index=None, batched=False, jsonl=False,
+                  implicit=None):
+    """Run `reverse_dependants` for every target in one process.
+
+    The file inventory, class locators and dependents memo are shared by all
+    targets (the parse cache is process-wide already). Trees are printed one
+    after another, separated by a blank line, or as one JSON object per line
+    with ``jsonl``. Returns the number of targets that could not be resolved.
+    """
+    memo = finder.DependentsMemo()
+    locator = ClassLocator.build(root, cfg, files_cache, index)
+    # simple names resolve against every .java file, as for a single target
+    name_locator = ClassLocator.build(root, index=index)
+    failed = 0
+    for i, target in enumerate(targets):
+        profiler.mark('target lookup')
+        target_fqn = resolve_target_fqn(root, target, index=index, locator=name_locator)
+        if target_fqn is None:
+            failed += 1
+            error = f"class file {target}.java not found under '{root}'."
+            if jsonl:
+                print(json.dumps({'target': target, 'error': error}))
+            else:
+                log(f'Error: {error}')
+            continue
+        if not jsonl:
+            if i:
+                print()
+            reverse_dependants(root, target_fqn, cfg, levels=levels, sort_strategy=sort_strategy, files_cache=files_cache,
+                               index=index, batched=batched, memo=memo, locator=locator, implicit=implicit)
+            continue
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            count = reverse_dependants(root, target_fqn, cfg, levels=levels, sort_strategy=sort_strategy,
+                                       files_cache=files_cache, index=index, batched=batched, memo=memo, locator=locator,
+                                       implicit=implicit)
+        # the last line is the 'Dependents found' summary
+        tree = out.getvalue().splitlines()[:-1]
+        print(json.dumps({'target': target, 'fqn': target_fqn, 'dependents': count, 'tree': tree}))
+    return failed
+
+def package_index(root, index=None):
+    """`parser.PackageIndex` over every `.java` file under ``root`` (or known to ``index``)."""
+    if index is not None:
+        return parser.PackageIndex(index.all_files, index.package_of)
+    return parser.PackageIndex(lambda: rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)]))
+
+
+def run_query(root, cfg, args, index=None, engine='rg-per-node'):
+    """Print the reverse tree, the imports or the DOT graph selected by ``args``."""
+    # type names in implements/extends clauses resolve against this tree's packages
+    previous, parser.PACKAGES = parser.PACKAGES, package_index(root, index)
+    try:
+        _run_query(root, cfg, args, index, engine)
+    finally:
+        parser.PACKAGES = previous
+
+
+def _run_query(root, cfg, args, index, engine):
+    if getattr(args, 'all_blast_radius', None):
+        profiler.mark('blast radius')
+        all_blast_radius(root, cfg, args.all_blast_radius, levels=args.levels, index=index)
+        return
+
+    if getattr(args, 'cycles', None) is not None:
+        profiler.mark('cycles')
+        import_cycles(root, cfg, limit=args.cycles, index=index)
+        return
+
+    if getattr(args, 'impact', None):
+        impact_analysis(root, args.impact, cfg, levels=args.levels, index=index,
+                        implicit_refs=getattr(args, 'implicit_refs', False), jsonl=getattr(args, 'jsonl', False))
+        return
+
+    targets = getattr(args, 'targets', None)
+    if targets is not None or getattr(args, 'targets_file', None):
+        # batch mode: reverse trees for many targets in one process; a
+        # daemon query carries the list the client read
+        if targets is None:
+            targets = read_targets(args.targets_file)
+        sort_strategy = None if args.nosort else 'lex'
+        profiler.mark('files cache')
+        if index is not None:
+            files_cache = index.precompute_files_cache(cfg)
+        else:
+            files_cache = rg_runner.precompute_files_cache(cfg, root)
+        implicit = build_implicit_refs(root, cfg, files_cache, index) if getattr(args, 'implicit_refs', False) else None
+        failed = reverse_batch(root, targets, cfg, levels=args.levels, sort_strategy=sort_strategy,
+                               files_cache=files_cache, index=index, batched=(engine == 'rg-frontier'), jsonl=args.jsonl,
+                               implicit=implicit)
+        if failed:
+            sys.exit(1)
+        return
+
+    if args.target and args.reverse:
+        # resolve target fqn if simple name
+        target = args.target
+        profiler.mark('target lookup')
+        target_fqn = resolve_target_fqn(root, target, index=index)
+        if target_fqn is None:
+            log(f"Error: class file {target}.java not found under '{root}'.")
+            sys.exit(1)
+        # Determine sort strategy: default to 'lex' unless --nosort is specified
+        sort_strategy = None if args.nosort else 'lex'
+        # Precompute files_cache from whitelist_regex to prune file set (improves performance)
+        profiler.mark('files cache')
+        if index is not None:
+            files_cache = index.precompute_files_cache(cfg)
+        else:
+            files_cache = rg_runner.precompute_files_cache(cfg, root)
+        implicit = build_implicit_refs(root, cfg, files_cache, index) if getattr(args, 'implicit_refs', False) else None
+
+        reverse_dependants(root, target_fqn, cfg, levels=args.levels, sort_strategy=sort_strategy, files_cache=files_cache,
+                           index=index, batched=(engine == 'rg-frontier'), implicit=implicit)
+        return
+
+    if args.target and getattr(args, 'forward', False):
+        profiler.mark('target lookup')
+        locator = ClassLocator.build(root, cfg, None, index)
+        target_fqn = resolve_target_fqn(root, args.target, index=index, locator=locator)
+        if target_fqn is None or not (locator.find_fqn(target_fqn) or locator.find_fqn(target_fqn, secondary=True)):
+            log(f"Error: class file {args.target}.java not found under '{root}'.")
+            sys.exit(1)
+        forward_dependencies(root, target_fqn, cfg, levels=args.levels, sort_strategy=None if args.nosort else 'lex',
+                             index=index, locator=locator)
+        return
+
+    if args.target and not args.reverse:
+        # when listing imports, respect whitelist prefilter if present
+        profiler.mark('files cache')
+        if index is not None:
+            files_cache = index.precompute_files_cache(cfg)
+        else:
+            files_cache = rg_runner.precompute_files_cache(cfg, root)
+        profiler.mark('imports')
+        list_imports_of_class(root, args.target, cfg, files_cache=files_cache, index=index)
+        return
+
+    # default: generate dot
+    profiler.mark('dot')
+    generate_dot(root, cfg, jobs=args.jobs, index=index)
+
 
 def main():
     argp = argparse.ArgumentParser()
     argp.add_argument('root', nargs='?', default='.')
     argp.add_argument('target', nargs='?')
     argp.add_argument('--reverse', action='store_true')
+    argp.add_argument('--forward', action='store_true',
+                      help='Print what target imports, transitively (capped by --levels), as a tree')
     argp.add_argument('--levels', type=int, default=0)
     argp.add_argument('--nosort', action='store_true', help='Disable all deterministic sorting for faster traversal')
     # BFS support removed; DFS is the only supported search strategy now.
     # The traversal helpers remain in `finder.py` for possible future re-enable.
     argp.add_argument('--verbose-rg', action='store_true', help='Print ripgrep commands to stderr')
+    argp.add_argument('--engine', choices=['rg-per-node', 'rg-frontier', 'graph', 'index'], default='rg-per-node',
+                      help='How dependents are looked up: one rg search per node (default), one rg search per '
+                           'traversal level, an in-memory graph built from a single rg pass, or the persistent import index')
+    argp.add_argument('--jobs', type=int, default=1, help='Worker processes used to parse files when generating DOT output')
+    argp.add_argument('--index', action='store_true', help='Shorthand for --engine=index (index is built on first use)')
+    argp.add_argument('--build-index', action='store_true', help='(Re)build the persistent import index for root and exit')
+    argp.add_argument('--refresh-index', action='store_true', help='Re-parse only files changed since the last index build/refresh and exit')
+    argp.add_argument('--save-graph', metavar='PATH',
+                      help='Parse every class under root once, write the graph as a binary snapshot to PATH and exit')
+    argp.add_argument('--load-graph', metavar='PATH',
+                      help='Answer the query from a snapshot written by --save-graph, without reading the source tree '
+                           '(the root stored in the snapshot is used; a single positional argument is the target)')
+    argp.add_argument('--implicit-refs', action='store_true',
+                      help='With --reverse, also count same-package uses and inline fully-qualified references '
+                           '(no import line) as dependents; scans every file once')
+    argp.add_argument('--targets-file', metavar='PATH',
+                      help="Print reverse trees for every target listed in PATH, one per line ('-' reads stdin)")
+    argp.add_argument('--impact', metavar='BASE..HEAD',
+                      help='Print every class affected (transitively, capped by --levels) by the .java files changed '
+                           'between two git revisions, with the changed class that causes each')
+    argp.add_argument('--jsonl', action='store_true',
+                      help='With --targets-file, print one JSON record per target instead of trees; with --impact, '
+                           'one per affected class')
+    argp.add_argument('--all-blast-radius', nargs='?', const='-', metavar='PATH',
+                      help='Count the transitive dependents of every class (capped by --levels) and write them, most '
+                           'dependents first, as CSV to stdout or PATH (JSON if PATH ends in .json; "-.json" is JSON '
+                           'to stdout)')
+    argp.add_argument('--cycles', nargs='?', type=int, const=10, metavar='N',
+                      help='List the N largest import cycles (default 10, 0 for all) with their classes')
+    argp.add_argument('--serve', action='store_true', help='Run a query daemon for root on localhost, keeping the index in memory')
+    argp.add_argument('--connect', action='store_true', help='Send this query to a running --serve daemon and print its output')
+    argp.add_argument('--port', type=int, default=daemon.DEFAULT_PORT, help='Port of the query daemon (default: %(default)s)')
+    argp.add_argument('--profile', nargs='?', const='-', metavar='JSON',
+                      help='Report per-phase timings, rg calls, parsing and cache statistics to stderr, or to JSON if given')
     args = argp.parse_args()
-
+    if args.connect:
+        # the daemon answers with its own config and engine: refuse what it would silently drop
+        dropped = [name for name, value in vars(args).items()
+                   if name not in daemon.QUERY_KEYS + daemon.CLIENT_KEYS and value != argp.get_default(name)]
+        if dropped:
+            argp.error('--connect does not support ' + ', '.join('--' + name.replace('_', '-') for name in dropped))
+
+    profile = profiler.Profile().start() if args.profile else None
+    try:
+        _main(args)
+    finally:
+        if profile is not None:
+            profile.caches['parse_cache'] = parser.PARSE_CACHE.stats()
+            profile.stop()
+            if args.profile == '-':
+                log(profile.format())
+            else:
+                profile.write_json(args.profile)
+
+
+def _main(args):
+    if args.connect:
+        # thin client: the daemon's config and index are used, not ours
+        query = vars(args)
+        if args.targets_file:
+            query = {**query, 'targets': read_targets(args.targets_file)}
+        out = args.all_blast_radius
+        if out and out not in ('-', '-.json'):
+            # the daemon never writes files; it prints the report and we write it
+            query = {**query, 'all_blast_radius': '-.json' if out.endswith('.json') else '-'}
+        reply = daemon.query(Path(args.root).resolve(), query, port=args.port)
+        if out and out not in ('-', '-.json') and reply['status'] == 0:
+            Path(out).write_text(reply.pop('stdout'), encoding='utf-8')
+            reply['stderr'] += f'Blast radius written to: {out}\n'
+        sys.stdout.write(reply.get('stdout', ''))
+        sys.stderr.write(reply['stderr'])
+        sys.exit(reply['status'])
+
+    profiler.mark('config')
     cfg = load_config()
 
     # enable verbose ripgrep output if requested
     if args.verbose_rg:
         rg_runner.VERBOSE_RG = True
+    rg_runner.set_backend(cfg['scan_backend'])
+
+    if args.load_graph:
+        profiler.mark('engine setup')
+        try:
+            index = GraphSnapshot.load(args.load_graph)
+        except (OSError, ValueError) as e:
+            log(f'Error: cannot load graph snapshot: {e}')
+            sys.exit(1)
+        if index.root.is_dir():
+            changed = index.changed_files()
+            if changed:
+                log(f"Warning: {len(changed)} file(s) under '{index.root}' changed since the snapshot was saved "
+                    f"(e.g. {changed[0]}); answering from the snapshot, rerun --save-graph to update it.")
+        if args.root != '.' and Path(args.root).resolve() != index.root:
+            # the root is the snapshot's: a lone positional argument is the target
+            if args.target is not None:
+                log(f"Error: --load-graph answers for the snapshot's root '{index.root}'; "
+                    f"drop the root argument '{args.root}'.")
+                sys.exit(1)
+            args.target = args.root
+        # everything is answered from the snapshot; the source tree is not read
+        run_query(index.root, cfg, args, index=index, engine='graph')
+        return
 
     root = Path(args.root)
     if not root.is_dir():
         log(f"Error: directory '{root}' does not exist.")
         sys.exit(1)
 
-    if args.target and args.reverse:
-        # resolve target fqn if simple name
-        target = args.target
-        if '.' not in target:
-            file = find_class_file(root, target)
-            if not file:
-                log(f"Error: class file {target}.java not found under '{root}'.")
-                sys.exit(1)
-            pkg, _, _ = parser.parse_package_and_imports(file)
-            target_fqn = f"{pkg}.{target}" if pkg else target
-        else:
-            target_fqn = target
-        # Determine sort strategy: default to 'lex' unless --nosort is specified
-        sort_strategy = None if args.nosort else 'lex'
-        # Precompute files_cache from whitelist_regex to prune file set (improves performance)
-        files_cache = rg_runner.precompute_files_cache(cfg, root)
+    if args.build_index:
+        index = ImportIndex.build(root)
+        index.close()
+        log('Index written to:', str(index.path))
+        return
 
-        reverse_dependants(root, target_fqn, cfg, levels=args.levels, sort_strategy=sort_strategy, files_cache=files_cache)
+    if args.save_graph:
+        GraphSnapshot.build(root).save(Path(args.save_graph))
+        log('Graph snapshot written to:', args.save_graph)
         return
 
-    if args.target and not args.reverse:
-        # when listing imports, respect whitelist prefilter if present
-        files_cache = rg_runner.precompute_files_cache(cfg, root)
-        list_imports_of_class(root, args.target, cfg, files_cache=files_cache)
+    if args.refresh_index:
+        index = ImportIndex.open(root)
+        stats = index.refresh()
+        index.close()
+        log(f"Index refreshed ({stats['mode']}): {stats['added']} added, {stats['updated']} updated, {stats['removed']} removed")
         return
 
-    # default: generate dot
-    generate_dot(root, cfg)
+    if args.serve:
+        disk = ImportIndex.open(root)
+        disk.refresh()
+        index = disk.to_memory()
+        disk.close()
+        answer = lambda query: run_query(root, cfg, argparse.Namespace(jobs=1, **query), index=index, engine='index')
+        server = daemon.QueryServer(root, index, answer, port=args.port)
+        log(f'Serving {root} on http://127.0.0.1:{args.port} (Ctrl-C to stop)')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    engine = 'index' if args.index else args.engine
+    profiler.mark('engine setup')
+    # `index` is whatever answers dependents lookups; None means one rg call per node
+    index = None
+    if engine == 'index':
+        # bring the index up to date incrementally before answering
+        index = ImportIndex.open(root)
+        index.refresh()
+    elif engine == 'graph':
+        index = ImportGraph.scan(root)
+
+    run_query(root, cfg, args, index=index, engine=engine)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Class-file locator built once per run.
+
+`ClassLocator` replaces the linear scans in `java_dep_graph.find_class_file`
+and the fresh ``rg --files -g *.java`` rescans that `reverse_dependants` used
+to run for every class it could not find. It keeps two tiers:
+
+- the primary tier: the file set `find_class_file` searched so far
+  (``files_cache`` or the files selected by the ripgrep include/exclude globs);
+- the secondary tier: every `.java` file under the root, listed lazily on the
+  first miss and only once.
+
+Each tier is indexed by simple name (``Foo`` -> candidate paths); FQN lookups
+parse only the candidates of that simple name and are memoized.
+"""
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import parser
+import profiler
+import rg_runner
+
+
+def _by_name(files: List[Path]) -> Dict[str, List[Path]]:
+    by_name: Dict[str, List[Path]] = {}
+    for f in files:
+        if f.name.endswith('.java'):
+            by_name.setdefault(f.name[:-5], []).append(f)
+    return by_name
+
+
+class ClassLocator:
+    """Simple-name and FQN lookups over the primary and secondary file tiers."""
+
+    def __init__(
+        self,
+        primary: List[Path],
+        list_secondary: Callable[[], List[Path]],
+        parse: Callable = parser.parse_package_and_imports,
+    ):
+        self._primary = _by_name(primary)
+        self._list_secondary = list_secondary
+        self._secondary: Dict[str, List[Path]] | None = None
+        self._parse = parse
+        self._fqn_memo: Dict[tuple, Path | None] = {}
+
+    @classmethod
+    def build(cls, root: Path, cfg=None, files_cache=None, index=None) -> 'ClassLocator':
+        """Locator over ``files_cache`` (or the cfg-selected files) plus all `.java` files."""
+        if index is not None:
+            primary = index.get_files(files_cache, cfg)
+            return cls(primary, index.all_files, index.parse_package_and_imports)
+        primary = rg_runner.get_files(root, files_cache, cfg)
+        return cls(primary, lambda: rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)]))
+
+    def _tier(self, secondary: bool) -> Dict[str, List[Path]]:
+        if not secondary:
+            return self._primary
+        if self._secondary is None:
+            profiler.add('locator_secondary_scans')
+            try:
+                self._secondary = _by_name(self._list_secondary())
+            except RuntimeError:
+                self._secondary = {}
+        return self._secondary
+
+    def candidates(self, simple_name: str, secondary: bool = False) -> List[Path]:
+        """Files named ``<simple_name>.java`` in the requested tier."""
+        return self._tier(secondary).get(simple_name, [])
+
+    def find(self, target: str) -> Path | None:
+        """Primary-tier lookup with `find_class_file` semantics.
+
+        A simple name returns the first file with that name; an FQN returns
+        the first file with that name whose package matches.
+        """
+        if '.' in target:
+            return self.find_fqn(target)
+        found = self.candidates(target)
+        return found[0] if found else None
+
+    def find_fqn(self, fqn: str, secondary: bool = False) -> Path | None:
+        """First file in the tier whose simple name and package match ``fqn``."""
+        key = (fqn, secondary)
+        if key not in self._fqn_memo:
+            profiler.add('locator_fqn_lookups')
+            pkg, _, simple = fqn.rpartition('.')
+            found = None
+            for c in self.candidates(simple, secondary):
+                if self._parse(c)[0] == pkg:
+                    found = c
+                    break
+            self._fqn_memo[key] = found
+        return self._fqn_memo[key]
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""In-process scan backend (``scan_backend=native``).
+
+`NativeBackend` runs the ripgrep command lines this tool builds without
+spawning ``rg``, for machines where it is not installed or where process
+start-up dominates small searches:
+
+- the tree is walked with ``os.scandir``, skipping hidden entries and
+  symlinks as ripgrep does; ``-g`` globs are applied with
+  `rg_runner.rg_glob_filter`, and directories they exclude are not entered;
+- a listing is kept per (paths, globs) and reused while the modification
+  times of the directories it walked are unchanged (adding, removing or
+  renaming a file changes them), so repeated searches re-walk nothing;
+- files are read (memory-mapped above `MMAP_MIN_BYTES`) and searched with
+  ``find`` for ``-F`` patterns or a compiled bytes regex otherwise, on a
+  thread pool.
+
+Only the options the callers use are understood (``--files``,
+``--files-with-matches``, ``--json``, ``-F``, ``-e``, ``-f``, ``-g``);
+anything else raises ``RuntimeError`` like a failed ``rg``. Unlike ripgrep,
+``.gitignore`` files are not read.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import profiler
+import rg_runner
+
+# files handed to a worker at a time; keeps per-task overhead small on big trees
+_CHUNK = 64
+# smaller files are read whole: for typical sources one read() is cheaper
+# than setting up and faulting in a mapping
+MMAP_MIN_BYTES = 1 << 20
+
+
+class _Request:
+    """The parts of a ripgrep command line the native backend understands."""
+
+    def __init__(self, cmd: List[str]):
+        self.mode = None
+        self.fixed = False
+        self.patterns: List[str] = []
+        self.globs: List[str] = []
+        self.paths: List[str] = []
+        args = iter(cmd[1:])
+        for arg in args:
+            if arg in ('--files', '--files-with-matches', '--json'):
+                self.mode = arg[2:]
+            elif arg == '-F':
+                self.fixed = True
+            elif arg == '-e':
+                self.patterns.append(next(args))
+            elif arg == '-f':
+                with open(next(args), encoding='utf-8') as fh:
+                    self.patterns.extend(fh.read().splitlines())
+            elif arg == '-g':
+                self.globs.append(next(args))
+            elif arg.startswith('-'):
+                raise RuntimeError(f'native scan: unsupported option {arg}')
+            else:
+                self.paths.append(arg)
+        if not self.paths:
+            self.paths.append('.')
+
+
+class _Matcher:
+    """Finds the lines of a buffer that match any of the patterns, line by line as ripgrep does."""
+
+    def __init__(self, patterns: List[str], fixed: bool):
+        if fixed:
+            self.needles = [p.encode() for p in patterns]
+            self.regex = None
+        else:
+            self.needles = None
+            self.regex = re.compile(b'|'.join(b'(?:%s)' % p.encode() for p in patterns), re.MULTILINE)
+
+    def line_starts(self, buf, first_only: bool = False) -> List[int]:
+        """Sorted start offsets of the matching lines of ``buf``."""
+        starts = set()
+        if self.needles is not None:
+            for needle in self.needles:
+                i = buf.find(needle)
+                while i != -1:
+                    start = buf.rfind(b'\n', 0, i) + 1
+                    starts.add(start)
+                    if first_only:
+                        return [start]
+                    end = buf.find(b'\n', i)
+                    i = -1 if end == -1 else buf.find(needle, end + 1)
+            return sorted(starts)
+        for m in self.regex.finditer(buf):
+            start = buf.rfind(b'\n', 0, m.start()) + 1
+            end = buf.find(b'\n', m.start())
+            if end == -1 or m.end() <= end:
+                starts.add(start)
+            else:
+                # the match ran across a newline (e.g. `\s*`): check each of its lines alone
+                while start < m.end():
+                    end = buf.find(b'\n', start)
+                    end = len(buf) if end == -1 else end
+                    if self.regex.search(buf, start, end):
+                        starts.add(start)
+                    start = end + 1
+            if first_only and starts:
+                return [min(starts)]
+        return sorted(starts)
+
+
+def _read(path: Path, matcher: _Matcher, first_only: bool) -> List[str]:
+    try:
+        with open(path, 'rb') as fh:
+            if os.fstat(fh.fileno()).st_size < MMAP_MIN_BYTES:
+                return _lines(fh.read(), matcher, first_only)
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                return _lines(buf, matcher, first_only)
+    except OSError:
+        return []
+
+
+def _lines(buf, matcher: _Matcher, first_only: bool) -> List[str]:
+    lines = []
+    for start in matcher.line_starts(buf, first_only):
+        end = buf.find(b'\n', start)
+        line = buf[start:end if end != -1 else len(buf)]
+        lines.append(line.decode('utf-8', errors='ignore').rstrip('\r'))
+    return lines
+
+
+def _mtime(path: str) -> int | None:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class NativeBackend(rg_runner.ScanBackend):
+    """``os.scandir`` walks plus file searches on ``workers`` threads."""
+
+    name = 'native'
+
+    def __init__(self, workers: int | None = None):
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        # `AsyncRipgrep` calls in from several threads: the pool is shared
+        # (its threads start on first use) and the listings are locked
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='native-scan')
+        # (paths, globs) -> ([(directory, mtime_ns), ...], files)
+        self._listings: Dict[tuple, Tuple[List[Tuple[str, int | None]], List[Path]]] = {}
+        self._listings_lock = threading.Lock()
+
+    def paths(self, cmd) -> List[Path]:
+        req = self._start(cmd)
+        started = time.perf_counter()
+        files = self._walk(req)
+        if req.mode == 'files':
+            out = files
+        elif req.mode == 'files-with-matches':
+            out = [f for f, lines in self._search(req, files, True) if lines]
+        else:
+            raise RuntimeError('native scan: expected --files or --files-with-matches')
+        profiler.add('native_scan_seconds', time.perf_counter() - started)
+        return out
+
+    def lines(self, cmd) -> List[Tuple[Path, str]]:
+        req = self._start(cmd)
+        if req.mode != 'json':
+            raise RuntimeError('native scan: expected --json')
+        started = time.perf_counter()
+        out = [(f, line) for f, lines in self._search(req, self._walk(req), False) for line in lines]
+        profiler.add('native_scan_seconds', time.perf_counter() - started)
+        return out
+
+    def _start(self, cmd) -> _Request:
+        if rg_runner.VERBOSE_RG:
+            rg_runner._print_cmd(cmd)
+        profiler.add('native_scans')
+        try:
+            return _Request(cmd)
+        except (OSError, StopIteration) as e:
+            raise RuntimeError(f'native scan: bad command: {e}') from None
+
+    def _walk(self, req: _Request) -> List[Path]:
+        key = (tuple(req.paths), tuple(req.globs))
+        with self._listings_lock:
+            cached = self._listings.get(key)
+        if cached is not None and all(_mtime(d) == m for d, m in cached[0]):
+            return list(cached[1])
+        selected = rg_runner._cached_glob_filter(tuple(req.globs))
+        dirs = []
+        out = []
+        for top in req.paths:
+            if os.path.isfile(top):
+                out.append(Path(top))  # explicit paths bypass globs
+                continue
+            stack = [('', top)]
+            while stack:
+                rel_dir, path = stack.pop()
+                dirs.append((path, _mtime(path)))
+                try:
+                    entries = sorted(os.scandir(path), key=lambda e: e.name)
+                except OSError:
+                    continue
+                subdirs = []
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    rel = rel_dir + entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if not selected.pruned(rel):
+                            subdirs.append((rel + '/', entry.path))
+                    elif entry.is_file(follow_symlinks=False) and selected(rel):
+                        out.append(Path(entry.path))
+                stack.extend(reversed(subdirs))
+        with self._listings_lock:
+            self._listings[key] = (dirs, out)
+        return list(out)
+
+    def _search(self, req: _Request, files: List[Path], first_only: bool):
+        """``(file, matching lines)`` for every file, in ``files`` order."""
+        matcher = _Matcher(req.patterns, req.fixed)
+
+        def scan(chunk):
+            return [(f, _read(f, matcher, first_only)) for f in chunk]
+
+        chunks = [files[i:i + _CHUNK] for i in range(0, len(files), _CHUNK)]
+        for part in self._pool.map(scan, chunks):
+            yield from part
@@ -1,18 +1,335 @@
 #!/usr/bin/env python3
+import os
 import re
+from collections import OrderedDict
 from pathlib import Path
 
+import profiler
+
+# line-level patterns for `package` and `import` declarations (MULTILINE)
+PACKAGE_RE = re.compile(r'^\s*package\s+([a-zA-Z_][a-zA-Z0-9_.]*)\s*;', re.MULTILINE)
+IMPORT_RE = re.compile(r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_.]*\*?)\s*;', re.MULTILINE)
+
+
+class ParsedFile:
+    """Immutable, compact result of parsing one Java file header.
+
+    ``implements``/``extends`` names that the file alone cannot qualify (no
+    single-type import) are kept as simple names; see `resolve_type`.
+    """
+
+    __slots__ = ('pkg', 'imports', 'wildcard_pkgs', 'implements', 'extends', 'kind')
+
+    def __init__(self, pkg, imports, wildcard_pkgs, implements, extends, kind):
+        for name, value in zip(self.__slots__, (pkg, tuple(imports), tuple(wildcard_pkgs),
+                                                 tuple(implements), tuple(extends), kind)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('ParsedFile is immutable')
+
+    def __repr__(self):
+        return f'ParsedFile(pkg={self.pkg!r}, kind={self.kind!r}, imports={len(self.imports)})'
+
+
+class ParseCache:
+    """Bounded LRU of `ParsedFile` records keyed by path and validated by mtime_ns.
+
+    ``hits``/``misses`` count lookups so callers can check that every file is
+    parsed at most once per run.
+    """
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # str(path) -> (mtime_ns, ParsedFile)
+
+    def get(self, path: Path) -> ParsedFile:
+        key = str(path)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime_ns = None
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == mtime_ns:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        record = parse_file(path)
+        self._entries[key] = (mtime_ns, record)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return record
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+
+# process-wide cache used by `parse_package_and_imports`
+PARSE_CACHE = ParseCache()
+
 
 def parse_package_and_imports(path: Path):
+    """Return ``(pkg, imports, implements)`` for ``path`` through `PARSE_CACHE`.
+
+    Simple names in ``implements`` are resolved with `resolve_type` against
+    the active `PACKAGES`.
+    """
+    record = PARSE_CACHE.get(path)
+    return record.pkg, record.imports, resolve_types(record.implements, record.pkg, record.imports)
+
+
+def parse_extends(path: Path):
+    """Resolved ``extends`` names of ``path`` (the superclass, or the
+    superinterfaces of an interface), through `PARSE_CACHE` like the
+    ``implements`` of `parse_package_and_imports`.
+    """
+    record = PARSE_CACHE.get(path)
+    return resolve_types(record.extends, record.pkg, record.imports)
+
+
+# prefix of a type name that no import, the own package or a wildcard package declares
+UNRESOLVED = '?'
+
+
+class PackageIndex:
+    """Which simple names each package declares, over a file inventory.
+
+    The inventory is listed on the first lookup and indexed by file name;
+    `declares` then parses only the files named like the type (usually one)
+    and memoizes the answer, so lookups are O(1) after the first.
+    """
+
+    def __init__(self, list_files, package_of=None):
+        self._list_files = list_files
+        self._package_of = package_of or (lambda path: PARSE_CACHE.get(path).pkg)
+        self._by_name = None
+        self._declared = {}  # (pkg, simple name) -> bool
+
+    def declares(self, pkg: str, name: str) -> bool:
+        key = (pkg, name)
+        found = self._declared.get(key)
+        if found is None:
+            if self._by_name is None:
+                self._by_name = {}
+                try:
+                    files = self._list_files()
+                except RuntimeError:
+                    files = []
+                for f in files:
+                    self._by_name.setdefault(Path(f).name, []).append(f)
+            found = any(self._package_of(f) == pkg for f in self._by_name.get(f'{name}.java', ()))
+            self._declared[key] = found
+        return found
+
+
+# resolution context of the current run (see `PackageIndex`); None resolves
+# unimported simple names to the file's own package
+PACKAGES: PackageIndex | None = None
+
+
+def resolve_type(name: str, pkg: str, imports, packages: PackageIndex | None = None) -> str:
+    """FQN of type ``name`` as written in a file of package ``pkg`` with ``imports``.
+
+    Java order: a qualified name as is, then a single-type import, the own
+    package and each wildcard-imported package in import order; a name none of
+    them declares is returned as ``UNRESOLVED + name``.
+    """
+    if '.' in name or name.startswith(UNRESOLVED):
+        return name
+    explicit = None
+    for imp in imports:
+        if not imp.endswith('.*') and imp.rsplit('.', 1)[-1] == name:
+            explicit = imp
+    if explicit:
+        return explicit
+    packages = packages if packages is not None else PACKAGES
+    own = f'{pkg}.{name}' if pkg else name
+    if packages is None or packages.declares(pkg, name):
+        return own
+    for imp in imports:
+        if imp.endswith('.*') and packages.declares(imp[:-2], name):
+            return f'{imp[:-2]}.{name}'
+    return UNRESOLVED + name
+
+
+def resolve_types(names, pkg: str, imports, packages: PackageIndex | None = None):
+    """`resolve_type` for each of ``names``."""
+    return tuple(resolve_type(n, pkg, imports, packages) for n in names)
+
+
+_HEADER_CHUNK = 8192
+_HEADER_SPECIAL_RE = re.compile(r'[/"\'(){]')
+_DECL_RE = re.compile(r'(?<![\w.$])(class|interface|enum|record)\b')
+_ANNOTATION_ARGS_RE = re.compile(r'@\s*[A-Za-z_$][\w$.]*\s*\(')
+
+
+def _blank_annotation_args(text: str) -> str:
+    """``text`` with the balanced argument list of each ``@Name(...)`` blanked.
+
+    Offsets and line breaks are kept, so `_DECL_RE` can search the result
+    without matching keywords like ``record = true`` inside the arguments.
+    """
+    out = []
+    pos = 0
+    m = _ANNOTATION_ARGS_RE.search(text)
+    while m:
+        depth = 0
+        end = len(text)
+        for i in range(m.end() - 1, len(text)):
+            if text[i] == '(':
+                depth += 1
+            elif text[i] == ')':
+                depth -= 1
+                if not depth:
+                    end = i + 1
+                    break
+        out.append(text[pos:m.end()])
+        out.append(re.sub(r'[^\n]', ' ', text[m.end():end - 1]))
+        pos = end - 1
+        m = _ANNOTATION_ARGS_RE.search(text, end)
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def _strip_type_args(decl: str) -> str:
+    """``decl`` with each balanced ``<...>`` group (type parameters and
+    arguments, including bounds like ``<T extends A & B>``) replaced by a space.
+    """
+    out = []
+    depth = 0
+    for ch in decl:
+        if ch == '<':
+            depth += 1
+        elif ch == '>' and depth:
+            depth -= 1
+            if not depth:
+                out.append(' ')
+        elif not depth:
+            out.append(ch)
+    return ''.join(out)
+
+
+def _blank(text: str) -> str:
+    # keep line breaks so `^`-anchored patterns still see line starts
+    return ' ' + '\n' * text.count('\n')
+
+
+def scan_header(path: Path, chunk_size: int = _HEADER_CHUNK) -> str:
+    """Return the source of ``path`` up to the opening brace of its first top-level type.
+
+    The file is read in ``chunk_size`` pieces and reading stops at that brace,
+    so large class bodies are never loaded. Comments are blanked and string
+    and character literals emptied, so `import`/`class` text inside them is
+    not mistaken for code. A brace inside parentheses (e.g. an annotation
+    argument like ``@SuppressWarnings({"a", "b"})``) does not end the header.
+    """
+    out = []
+    buf = ''
+    depth = 0
+    eof = False
     with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+        def more() -> bool:
+            nonlocal buf, eof
+            if eof:
+                return False
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+                return False
+            buf += chunk
+            profiler.add('bytes_read', len(chunk))
+            return True
+
+        more()
+        while True:
+            m = _HEADER_SPECIAL_RE.search(buf)
+            if not m:
+                out.append(buf)
+                buf = ''
+                if not more():
+                    break
+                continue
+            i = m.start()
+            c = buf[i]
+            out.append(buf[:i])
+            if c == '{':
+                if depth == 0:
+                    break
+                out.append(c)
+                buf = buf[i + 1:]
+                continue
+            if c in '()':
+                depth = depth + 1 if c == '(' else max(0, depth - 1)
+                out.append(c)
+                buf = buf[i + 1:]
+                continue
+            # comments and literals: make sure the terminator is buffered
+            if c == '/':
+                while len(buf) < i + 2 and more():
+                    pass
+                nxt = buf[i + 1:i + 2]
+                if nxt == '/':
+                    terminator, start, keep = '\n', i + 2, True
+                elif nxt == '*':
+                    terminator, start, keep = '*/', i + 2, False
+                else:
+                    out.append(c)
+                    buf = buf[i + 1:]
+                    continue
+                end = buf.find(terminator, start)
+                while end == -1 and more():
+                    end = buf.find(terminator, start)
+                if end == -1:
+                    break
+                out.append(_blank(buf[i:end]))
+                buf = buf[end + (0 if keep else len(terminator)):]
+                continue
+            # string, text block or char literal
+            while len(buf) < i + 3 and more():
+                pass
+            quote = '"""' if buf.startswith('"""', i) else c
+            j = i + len(quote)
+            while True:
+                end = buf.find(quote, j)
+                while end == -1 and more():
+                    end = buf.find(quote, j)
+                if end == -1:
+                    break
+                backslashes = len(buf[j:end]) - len(buf[j:end].rstrip('\\'))
+                if backslashes % 2 == 0:
+                    break
+                j = end + 1
+            if end == -1:
+                break
+            out.append(quote + _blank(buf[i + len(quote):end])[1:] + quote)
+            buf = buf[end + len(quote):]
+    return ''.join(out)
+
+
+def parse_file(path: Path) -> ParsedFile:
+    """Parse ``path`` (uncached) into a `ParsedFile`.
+
+    Only the header returned by `scan_header` is examined.
+    """
+    profiler.add('files_parsed')
+    header = scan_header(path)
 
     # package
-    pkg_match = re.search(r'^\s*package\s+([a-zA-Z_][a-zA-Z0-9_.]*)\s*;', content, re.MULTILINE)
+    pkg_match = PACKAGE_RE.search(header)
     pkg = pkg_match.group(1) if pkg_match else ''
 
     # imports (keep as list of FQNs)
-    imports = re.findall(r'^\s*import\s+([a-zA-Z_][a-zA-Z0-9_.]*\*?)\s*;', content, re.MULTILINE)
+    import_matches = list(IMPORT_RE.finditer(header))
+    imports = [m.group(1) for m in import_matches]
 
     # build import map: simple name -> FQN, and collect wildcard packages
     import_map = {}
@@ -26,21 +343,16 @@ def parse_package_and_imports(path: Path):
 
     # class declaration: collect extends + implements, resolve via imports when possible
     implements = []
-    # Work with the header portion up to the first '{' to handle multi-line declarations
-    # Find the class/interface/enum keyword and then find the opening brace after it
-    class_match = re.search(r'\b(class|interface|enum)\b', content)
+    extends = []
+    # The type declaration follows the package/import section; the header
+    # already stops at its opening brace, so multi-line declarations are whole.
+    decl_from = max(pkg_match.end() if pkg_match else 0,
+                    import_matches[-1].end() if import_matches else 0)
+    header = _blank_annotation_args(header)
+    class_match = _DECL_RE.search(header, decl_from)
     if class_match:
-        # Find the opening brace after the class keyword
-        class_start = class_match.start()
-        brace_pos = content.find('{', class_start)
-        if brace_pos != -1:
-            header = content[class_start:brace_pos]
-        else:
-            header = content[class_start:]
-    else:
-        header = content.split('{', 1)[0]
-    
-    class_match = re.search(r'\b(class|interface|enum)\b', header)
+        # an `extends` inside type parameters is a bound, not the superclass
+        header = _strip_type_args(header[class_match.start():])
 
     def resolve_name(name: str) -> str:
         name = name.strip()
@@ -55,13 +367,11 @@ def parse_package_and_imports(path: Path):
             return token
         if token in import_map:
             return import_map[token]
-        if wildcard_pkgs:
-            return f"{wildcard_pkgs[0]}.{token}"
-        if pkg:
-            return f"{pkg}.{token}"
+        # own package or a wildcard package: needs the file inventory, see `resolve_type`
         return token
 
 
+    kind = class_match.group(1) if class_match else ''
     if class_match:
         # extract extends/implements clauses from the header
         extends_m = re.search(r'extends\s+([a-zA-Z0-9_.\s,]+)', header)
@@ -72,9 +382,15 @@ def parse_package_and_imports(path: Path):
                 r = resolve_name(i)
                 if r:
                     implements.append(r)
+        if extends_m:
+            # the character class also swallows a following `implements ...` clause
+            extends_str = re.split(r'\bimplements\b', extends_m.group(1))[0]
+            for e in re.split(r'\s*,\s*', extends_str):
+                r = resolve_name(e)
+                if r:
+                    extends.append(r)
 
-    # return package, imports list, implements list
-    return pkg, imports, implements
+    return ParsedFile(pkg, imports, wildcard_pkgs, implements, extends, kind)
 
 
 def apply_filters(item, whitelist, blacklist):
@@ -85,5 +401,47 @@ def apply_filters(item, whitelist, blacklist):
     return True
 
 
+class ImportFilter:
+    """`apply_filters` for one include/exclude pattern pair, compiled once and memoized per name.
+
+    Call it with an FQN (or import) to get the verdict; each distinct name is
+    matched against the patterns only the first time. `UNRESOLVED` names are
+    always rejected.
+    """
+
+    __slots__ = ('include', 'exclude', '_include_re', '_exclude_re', '_verdicts')
+
+    def __init__(self, include=None, exclude=None):
+        self.include = include or ''
+        self.exclude = exclude or ''
+        self._include_re = re.compile(self.include) if self.include else None
+        self._exclude_re = re.compile(self.exclude) if self.exclude else None
+        self._verdicts = {}
+
+    def __call__(self, item) -> bool:
+        verdict = self._verdicts.get(item)
+        if verdict is None:
+            verdict = (not item.startswith(UNRESOLVED)
+                       and (self._include_re is None or self._include_re.search(item) is not None)
+                       and (self._exclude_re is None or self._exclude_re.search(item) is None))
+            self._verdicts[item] = verdict
+        return verdict
+
+
+# filters shared by every caller with the same patterns (see `import_filter`)
+_IMPORT_FILTERS = {}
+
+
+def import_filter(cfg) -> ImportFilter:
+    """The shared `ImportFilter` for the import include/exclude patterns of ``cfg``."""
+    cfg = cfg or {}
+    key = (cfg.get('import_include_patterns') or cfg.get('whitelist_regex') or '',
+           cfg.get('import_exclude_patterns') or cfg.get('blacklist_regex') or '')
+    found = _IMPORT_FILTERS.get(key)
+    if found is None:
+        found = _IMPORT_FILTERS[key] = ImportFilter(*key)
+    return found
+
+
 def is_test_path(s: str) -> bool:
     return any(tok in s for tok in ('/test/', '\\test\\', '/src/test/', '\\src\\test\\'))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Opt-in run profile for ``--profile``.
+
+While a `Profile` is active (`profiler.ACTIVE`), code marks the phase it is
+entering with `mark` and bumps named counters with `add`; both are no-ops
+otherwise, so call sites need no guard. Phases are laps: a phase lasts until
+the next `mark`, and repeated phases (e.g. one traversal per target) add up.
+
+Counters in use:
+
+- ``rg_calls``/``rg_seconds``: ripgrep processes and their summed wall time
+  (concurrent calls overlap, so the sum can exceed the traversal time)
+- ``native_scans``/``native_scan_seconds``: the same for the in-process
+  `native_scan.NativeBackend`
+- ``files_parsed``/``bytes_read``: headers parsed by `parser.parse_file`
+  and the characters read for them (equal to bytes for ASCII sources)
+- ``dependents_memo_hits``/``dependents_memo_misses``: `finder.DependentsMemo`
+- ``locator_fqn_lookups``/``locator_secondary_scans``: `locator.ClassLocator`
+- ``implicit_bytes_scanned``: source text scanned by `refscan.ImplicitRefs`
+"""
+from __future__ import annotations
+
+import json
+import time
+import tracemalloc
+from typing import Dict, List
+
+ACTIVE: 'Profile | None' = None
+
+
+class Profile:
+    """Per-phase wall/CPU time, counters and peak traced memory of one run."""
+
+    def __init__(self, trace_memory: bool = True):
+        # tracemalloc slows allocation-heavy code down noticeably; benchmarks turn it off
+        self.trace_memory = trace_memory
+        self.phases: Dict[str, List[float]] = {}  # name -> [wall, cpu]
+        self.counters: Dict[str, float] = {}
+        self.caches: Dict[str, dict] = {}
+        self.peak_memory = 0
+        self._current: str | None = None
+        self._since = (0.0, 0.0)
+
+    def start(self) -> 'Profile':
+        global ACTIVE
+        if self.trace_memory:
+            tracemalloc.start()
+        ACTIVE = self
+        return self
+
+    def stop(self) -> None:
+        global ACTIVE
+        self.mark(None)
+        if self.trace_memory:
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        ACTIVE = None
+
+    def mark(self, name: str | None) -> None:
+        now = (time.perf_counter(), time.process_time())
+        if self._current is not None:
+            acc = self.phases.setdefault(self._current, [0.0, 0.0])
+            acc[0] += now[0] - self._since[0]
+            acc[1] += now[1] - self._since[1]
+        self._current, self._since = name, now
+
+    def add(self, name: str, value: float = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        caches = {}
+        for name, stats in self.caches.items():
+            lookups = stats.get('hits', 0) + stats.get('misses', 0)
+            caches[name] = dict(stats, hit_ratio=round(stats.get('hits', 0) / lookups, 4) if lookups else None)
+        for name in ('dependents_memo',):
+            hits = self.counters.get(f'{name}_hits', 0)
+            misses = self.counters.get(f'{name}_misses', 0)
+            if hits or misses:
+                caches[name] = {'hits': hits, 'misses': misses, 'hit_ratio': round(hits / (hits + misses), 4)}
+        return {
+            'phases': {name: {'wall_s': round(wall, 6), 'cpu_s': round(cpu, 6)}
+                       for name, (wall, cpu) in self.phases.items()},
+            'counters': {name: round(v, 6) if isinstance(v, float) else v for name, v in self.counters.items()},
+            'caches': caches,
+            'peak_memory_bytes': self.peak_memory,
+        }
+
+    def format(self) -> str:
+        r = self.report()
+        lines = ['Profile:', f"  {'phase':<20} {'wall s':>9} {'cpu s':>9}"]
+        for name, t in r['phases'].items():
+            lines.append(f"  {name:<20} {t['wall_s']:>9.3f} {t['cpu_s']:>9.3f}")
+        for name, value in r['counters'].items():
+            lines.append(f'  {name}: {value:.3f}' if isinstance(value, float) else f'  {name}: {value}')
+        for name, stats in r['caches'].items():
+            ratio = stats['hit_ratio']
+            shown = f'{ratio:.1%}' if ratio is not None else 'n/a'
+            lines.append(f"  {name}: {stats['hits']} hits, {stats['misses']} misses ({shown})")
+        lines.append(f"  peak traced memory: {r['peak_memory_bytes'] / 1e6:.1f} MB")
+        return '\n'.join(lines)
+
+    def write_json(self, path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+            f.write('\n')
+
+
+def mark(name: str) -> None:
+    """Enter phase ``name`` of the active profile, if any."""
+    if ACTIVE is not None:
+        ACTIVE.mark(name)
+
+
+def add(name: str, value: float = 1) -> None:
+    """Add ``value`` to counter ``name`` of the active profile, if any."""
+    if ACTIVE is not None:
+        ACTIVE.add(name, value)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Implicit class references for ``--implicit-refs``.
+
+The engines only find dependents through ``import X;`` and ``import pkg.*;``
+lines, so they miss classes used from the same package (which need no
+import) and inline fully-qualified references (``new com.acme.api.Quote()``).
+`ImplicitRefs.build` scans every file of the search scope once. It blanks
+out comments and string literals, picks out every dotted identifier chain
+with one regex pass, and looks each chain up in hash tables of the known
+classes:
+
+- its first identifier among the simple names of the file's own package,
+  unless a single-type import of the file shadows that name;
+- its dotted prefixes among all known FQNs.
+
+Class names can only match at identifier boundaries, so tokenizing once and
+probing dicts finds the same references as an Aho-Corasick automaton over
+all names, at the speed of the C regex engine.
+"""
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Set
+
+import profiler
+
+# package/import lines (already seen by the engines), text blocks, comments,
+# string and char literals
+_NOISE_RE = re.compile(r'(?m:^[ \t]*(?:package|import)\b[^;\n]*;)'
+                       r'|"""[\s\S]*?"""|//[^\n]*|/\*[\s\S]*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'')
+_CHAIN_RE = re.compile(r'[A-Za-z_$][\w$]*(?:\s*\.\s*[A-Za-z_$][\w$]*)*')
+
+
+def references(text: str, pkg: str, own: str, local_names: Set[str], fqns: Set[str],
+               imports: Iterable[str] = ()) -> Set[str]:
+    """FQNs of known classes that the source ``text`` of class ``own`` in ``pkg`` refers to.
+
+    A simple name that one of the single-type ``imports`` brings in refers to
+    the imported class, not to the same-package one (Java's shadowing rule).
+    """
+    found = set()
+    shadowed = {imp.rsplit('.', 1)[-1] for imp in imports if not imp.endswith('.*')}
+    local_names = local_names - shadowed if shadowed else local_names
+    for chain in set(_CHAIN_RE.findall(_NOISE_RE.sub(' ', text))):
+        if '.' not in chain:
+            if chain != own and chain in local_names:
+                found.add(f'{pkg}.{chain}' if pkg else chain)
+            continue
+        parts = [p.strip() for p in chain.split('.')]
+        first = parts[0]
+        if first != own and first in local_names:
+            found.add(f'{pkg}.{first}' if pkg else first)
+        name = first
+        for part in parts[1:]:
+            name = f'{name}.{part}'
+            if name in fqns:
+                found.add(name)
+                break
+    found.discard(f'{pkg}.{own}' if pkg else own)
+    return found
+
+
+class ImplicitRefs:
+    """Reverse map of implicit references: FQN -> files referring to it without an import."""
+
+    def __init__(self, refs: Dict[str, List[Path]] | None = None):
+        self.refs = refs if refs is not None else {}
+
+    @classmethod
+    def build(cls, files: Iterable[Path], parse: Callable) -> 'ImplicitRefs':
+        """Scan ``files``; their classes are the ones references are resolved against."""
+        files = list(files)
+        headers = [parse(f) for f in files]
+        packages = [header[0] for header in headers]
+        local: Dict[str, Set[str]] = {}
+        fqns = set()
+        for f, pkg in zip(files, packages):
+            local.setdefault(pkg, set()).add(f.stem)
+            fqns.add(f'{pkg}.{f.stem}' if pkg else f.stem)
+        refs: Dict[str, List[Path]] = {}
+        for f, (pkg, imports, _) in zip(files, headers):
+            try:
+                with open(f, 'r', encoding='utf-8', errors='ignore') as fh:
+                    text = fh.read()
+            except OSError:
+                continue
+            profiler.add('implicit_bytes_scanned', len(text))
+            for fqn in references(text, pkg, f.stem, local[pkg], fqns, imports):
+                refs.setdefault(fqn, []).append(f)
+        return cls(refs)
+
+    def merge(self, fqn: str, matches: List[Path], sort_strategy: str | None = None) -> List[Path]:
+        """``matches`` (the import-based dependents of ``fqn``) plus its implicit referrers."""
+        extra = self.refs.get(fqn)
+        if not extra:
+            return matches
+        have = {str(p) for p in matches}
+        merged = list(matches) + [p for p in extra if str(p) not in have]
+        if sort_strategy == 'lex':
+            merged.sort(key=lambda p: str(p))
+        return merged
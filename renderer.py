@@ -1,6 +1,42 @@
 #!/usr/bin/env python3
 import re
 import sys
+from typing import TextIO
+
+from idgraph import ChildTree
+
+# rendered lines are written out in chunks of this many
+_FLUSH_LINES = 4096
+
+
+def _combine(patterns):
+    """One compiled pattern matching where any of ``patterns`` matches (None for none)."""
+    if not patterns:
+        return None
+    if len(patterns) == 1:
+        return patterns[0]
+    try:
+        combined = re.compile('|'.join(f'(?:{p.pattern})' for p in patterns))
+    except re.error:
+        combined = None
+    # numbered backreferences would point at other groups once the patterns are joined
+    if combined is None or any(re.search(r'\\[1-9]', p.pattern) for p in patterns):
+        return _AnyOf(patterns)
+    return combined
+
+
+class _AnyOf:
+    """Fallback for patterns that cannot be joined: searches them one by one."""
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+
+    def search(self, item):
+        for p in self.patterns:
+            m = p.search(item)
+            if m is not None:
+                return m
+        return None
 
 
 class Renderer:
@@ -32,6 +68,10 @@ class Renderer:
         # legacy default exclude pattern when no includes/excludes configured
         if not self._exclude_res and not self._include_res:
             self._exclude_res.append(re.compile(r'(?:Impl$|\.Impl\.)'))
+        # each list is searched as one alternation
+        self._include_re = _combine(self._include_res)
+        self._exclude_re = _combine(self._exclude_res)
+        self._excluded: dict[str, bool] = {}  # name -> pattern verdict, kept across renders
 
     def render_bfs(self, children, target, top_extras=None):
         # Deprecated: delegate to deprecated_bfs.render_bfs
@@ -42,66 +82,92 @@ class Renderer:
 
     def render_dfs(
         self,
-        children: dict[str, list[tuple[int, str]]],
+        children: ChildTree | dict[str, list[tuple[int, str]]],
         target: str,
         top_extras: list[str] | None = None,
         allow_impl_pairs: bool = False,
+        out: TextIO | None = None,
     ) -> int:
-        """Render DFS tree respecting include/exclude patterns and implementation rules."""
-        print(target)
+        """Render DFS tree respecting include/exclude patterns and implementation rules.
+
+        ``children`` is an `idgraph.ChildTree` (a ``{parent: [(level, child)]}``
+        dict is packed into one first); names are only looked up to print them.
+        The walk uses an explicit stack, so deep chains do not hit the recursion
+        limit, and lines are written to ``out`` (default: stdout) in chunks.
+        """
+        if not isinstance(children, ChildTree):
+            children = ChildTree.from_dict(children)
+        names = children.names
+        out = out if out is not None else sys.stdout
+        lines = [target]
         count = 0
-        seen: set[str] = {target}
+        target_id = names.get(target)
+        seen: set[int] = {target_id}
+        all_children = None  # ids of every child in the tree, built on first use
+
+        def is_excluded(child_id: int, parent: int) -> bool:
+            nonlocal all_children
+            # Inclusion/exclusion logic:
+            # - If include patterns are configured: render only if any include matches.
+            # - Otherwise, skip a node if any exclude pattern matches.
+            # - Exception: if allow_impl_pairs is True and this is an implementation that has its interface as a sibling, allow it
+            child = names.name(child_id)
+            should_exclude = self._excluded.get(child)
+            if should_exclude is None:
+                if self._include_re is not None:
+                    should_exclude = self._include_re.search(child) is None
+                else:
+                    should_exclude = self._exclude_re is not None and self._exclude_re.search(child) is not None
+                self._excluded[child] = should_exclude
+            if should_exclude and allow_impl_pairs and child.endswith('Impl'):
+                if all_children is None:
+                    all_children = children.child_ids()
+                interface_found = names.get(child[:-4]) in all_children
+
+                direct_dependent = True
 
-        def print_subtree(parent: str):
+                if interface_found or direct_dependent or (parent == target_id and child.endswith('Impl')):
+                    should_exclude = False
+            return should_exclude
+
+        def print_subtree(root: int):
+            # preorder walk; each stack entry is a parent and the iterator over its remaining children
             nonlocal count
-            lst = children.get(parent, [])
-            for idx, (lvl, child) in enumerate(lst):
-                # Inclusion/exclusion logic:
-                # - If include patterns are configured: render only if any include matches.
-                # - Otherwise, skip a node if any exclude pattern matches.
-                # - Exception: if allow_impl_pairs is True and this is an implementation that has its interface as a sibling, allow it
-                should_exclude = False
-                if self._include_res:
-                    if not any(r.search(child) for r in self._include_res):
-                        should_exclude = True
+            stack = [(root, children.get(root))]
+            while stack:
+                parent, pending = stack[-1]
+                for lvl, child in pending:
+                    if is_excluded(child, parent):
+                        continue
+
+                    indent = '  ' * (lvl - 1)
+                    marker = f'{lvl}- '
+                    lines.append(f"{indent}{marker}{names.name(child)}")
+                    count += 1
+                    if len(lines) >= _FLUSH_LINES:
+                        flush()
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append((child, children.get(child)))
+                        break
                 else:
-                    if any(r.search(child) for r in self._exclude_res):
-                        should_exclude = True
-                if should_exclude and allow_impl_pairs and child.endswith('Impl'):
-                    interface_name = child[:-4]
-                    interface_found = False
-                    for check_parent, check_children in children.items():
-                        for check_lvl, check_child in check_children:
-                            if check_child == interface_name:
-                                interface_found = True
-                                break
-                        if interface_found:
-                            break
-                    
-                    direct_dependent = True
-                    
-                    if interface_found or direct_dependent or (parent == target and child.endswith('Impl')):
-                        should_exclude = False
-                
-                if should_exclude:
-                    continue
+                    stack.pop()
 
-                indent = '  ' * (lvl - 1)
-                marker = f'{lvl}- '
-                print(f"{indent}{marker}{child}")
-                count += 1
-                if child not in seen:
-                    seen.add(child)
-                    print_subtree(child)
+        def flush():
+            if lines:
+                out.write('\n'.join(lines) + '\n')
+                lines.clear()
 
         # print any top_extras as separate top-level subtrees (no prefix on the extra itself)
         if top_extras:
             for extra in top_extras:
-                print(extra)
+                lines.append(extra)
                 count += 1
-                if extra not in seen:
-                    seen.add(extra)
-                    print_subtree(extra)
+                extra_id = names.get(extra)
+                if extra_id not in seen:
+                    seen.add(extra_id)
+                    print_subtree(extra_id)
 
-        print_subtree(target)
+        print_subtree(target_id)
+        flush()
         return count
@@ -1,10 +1,33 @@
 #!/usr/bin/env python3
+"""Listing and searching the tree.
+
+Callers describe every listing or search as a ripgrep command line and run
+it with `run_ripgrep` (paths) or `run_ripgrep_json` (matched lines). The
+active `ScanBackend` (`BACKEND`, chosen with `set_backend` from the
+``scan_backend`` config key) executes it: `RipgrepBackend` spawns ``rg``,
+`native_scan.NativeBackend` interprets the options in-process.
+"""
+import abc
+import asyncio
+import base64
+import functools
+import json
+import os
+import re
+import shutil
 import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
 
+import profiler
+
 # When True, print ripgrep commands to stderr before running (set by caller)
 VERBOSE_RG = False
 
+SCAN_BACKENDS = ('auto', 'rg', 'native')
+
 
 def build_rg_exclude_args(cfg=None):
     """Return list of ripgrep `-g` args built from cfg include/exclude globs.
@@ -27,27 +50,152 @@ def build_rg_exclude_args(cfg=None):
     return args
 
 
-def run_ripgrep(cmd):
-    if VERBOSE_RG:
-        import sys
-        try:
-            print('rg command:', ' '.join(cmd), file=sys.stderr)
-        except Exception:
-            print('rg command: (failed to render)', file=sys.stderr)
-    p = subprocess.run(cmd, capture_output=True, text=True)
-    if p.returncode not in (0, 1):
-        import sys
+def _print_cmd(cmd):
+    try:
+        print('rg command:', ' '.join(cmd), file=sys.stderr)
+    except Exception:
+        print('rg command: (failed to render)', file=sys.stderr)
+
+
+def _check(cmd, returncode, stdout, stderr):
+    if returncode not in (0, 1):
         # Print full debug info to stderr so callers can separate it from stdout
-        try:
-            print('rg command:', ' '.join(cmd), file=sys.stderr)
-        except Exception:
-            print('rg command: (failed to render)', file=sys.stderr)
-        if p.stderr:
-            print(p.stderr, file=sys.stderr)
+        _print_cmd(cmd)
+        if stderr:
+            print(stderr, file=sys.stderr)
         else:
             print('rg failed with no stderr output', file=sys.stderr)
-        raise RuntimeError(p.stderr or 'rg failed')
-    return [Path(x) for x in p.stdout.splitlines() if x.strip()]
+        raise RuntimeError(stderr or 'rg failed')
+    return stdout
+
+
+def _run(cmd):
+    if VERBOSE_RG:
+        _print_cmd(cmd)
+    started = time.perf_counter()
+    p = subprocess.run(cmd, capture_output=True, text=True)
+    profiler.add('rg_calls')
+    profiler.add('rg_seconds', time.perf_counter() - started)
+    return _check(cmd, p.returncode, p.stdout, p.stderr)
+
+
+class ScanBackend(abc.ABC):
+    """Executes the ripgrep command lines built by the callers."""
+
+    name = ''
+
+    @abc.abstractmethod
+    def paths(self, cmd):
+        """Output paths of a ``--files`` or ``--files-with-matches`` command."""
+
+    @abc.abstractmethod
+    def lines(self, cmd):
+        """``(path, line)`` per matched line of a ``--json`` command."""
+
+
+class RipgrepBackend(ScanBackend):
+    """One ``rg`` process per command."""
+
+    name = 'rg'
+
+    def paths(self, cmd):
+        return [Path(x) for x in _run(cmd).splitlines() if x.strip()]
+
+    def lines(self, cmd):
+        out = []
+        for raw in _run(cmd).splitlines():
+            msg = json.loads(raw)
+            if msg.get('type') != 'match':
+                continue
+            data = msg['data']
+            out.append((Path(_json_text(data['path'])), _json_text(data['lines']).rstrip('\r\n')))
+        return out
+
+
+BACKEND: ScanBackend = RipgrepBackend()
+
+
+def set_backend(name):
+    """Make backend ``name`` (see `SCAN_BACKENDS`) the active one; ``auto`` prefers ``rg`` if installed."""
+    global BACKEND
+    if name not in SCAN_BACKENDS:
+        raise ValueError(f'unknown scan backend: {name}')
+    if name == 'auto':
+        name = 'rg' if shutil.which('rg') else 'native'
+    if name == 'native':
+        from native_scan import NativeBackend
+        BACKEND = NativeBackend()
+    else:
+        BACKEND = RipgrepBackend()
+    return BACKEND
+
+
+def run_ripgrep(cmd):
+    return BACKEND.paths(cmd)
+
+
+class AsyncRipgrep:
+    """Runs `run_ripgrep` commands on a background asyncio loop, at most ``limit`` at a time.
+
+    `submit` returns a `concurrent.futures.Future` of the matched paths, so
+    synchronous code can start several searches and collect them later::
+
+        with AsyncRipgrep(8) as rg:
+            futures = [rg.submit(cmd) for cmd in cmds]
+            results = [f.result() for f in futures]
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='rg-async', daemon=True)
+        self._slots = None
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    async def _exec(self, cmd):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.limit)
+        if not isinstance(BACKEND, RipgrepBackend):
+            # in-process backends block: run them on the loop's worker threads
+            async with self._slots:
+                return await asyncio.get_running_loop().run_in_executor(None, BACKEND.paths, cmd)
+        async with self._slots:
+            if VERBOSE_RG:
+                _print_cmd(cmd)
+            started = time.perf_counter()
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            out, err = await proc.communicate()
+            profiler.add('rg_calls')
+            profiler.add('rg_seconds', time.perf_counter() - started)
+        stdout = _check(cmd, proc.returncode, out.decode(errors='replace'), err.decode(errors='replace'))
+        return [Path(x) for x in stdout.splitlines() if x.strip()]
+
+    def submit(self, cmd):
+        return asyncio.run_coroutine_threadsafe(self._exec(cmd), self._loop)
+
+
+def _json_text(obj):
+    # ripgrep reports non-UTF-8 data base64-encoded under `bytes`
+    if 'text' in obj:
+        return obj['text']
+    return base64.b64decode(obj.get('bytes', '')).decode('utf-8', errors='ignore')
+
+
+def run_ripgrep_json(cmd):
+    """Run ``cmd`` (which must include ``--json``) and return ``(path, line)`` pairs.
+
+    One pair per matched line, grouped by file in ripgrep's output order.
+    """
+    return BACKEND.lines(cmd)
 
 
 def run_rg_files(root, cfg=None):
@@ -71,3 +219,139 @@ def precompute_files_cache(cfg, root):
         except RuntimeError:
             return None
     return None
+
+
+def _glob_to_regex(glob):
+    """Translate a ripgrep/gitignore style glob into a compiled regex.
+
+    Returns ``(regex, anchored)``. Globs without a ``/`` are matched against
+    the last path component only, like ripgrep does.
+    """
+    glob = glob.rstrip('/')
+    anchored = '/' in glob
+    glob = glob.lstrip('/')
+    out = []
+    i = 0
+    n = len(glob)
+    while i < n:
+        if glob.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif glob.startswith('/**', i) and i + 3 == n:
+            out.append('/.*')
+            i += 3
+        elif glob.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif glob[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif glob[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif glob[i] == '[':
+            j = glob.find(']', i + 2)
+            if j == -1:
+                out.append(re.escape(glob[i]))
+                i += 1
+                continue
+            body = glob[i + 1:j]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = j + 1
+        elif glob[i] == '{':
+            j = glob.find('}', i)
+            if j == -1:
+                out.append(re.escape(glob[i]))
+                i += 1
+                continue
+            alts = glob[i + 1:j].split(',')
+            out.append('(?:' + '|'.join(re.escape(a) for a in alts) + ')')
+            i = j + 1
+        else:
+            out.append(re.escape(glob[i]))
+            i += 1
+    return re.compile(''.join(out) + r'\Z'), anchored
+
+
+def rg_glob_filter(globs):
+    """Return a predicate ``f(rel_path) -> bool`` mimicking ripgrep `-g` globs.
+
+    ``rel_path`` is a ``/``-separated path relative to the searched root.
+    As in ripgrep, later globs take precedence, a ``!`` glob excludes, a
+    directory matched by an exclude glob prunes everything below it, and
+    when any non-negated glob is present a file must match one of them.
+    The predicate's ``pruned(rel_dir)`` tells whether a whole directory is
+    excluded.
+    """
+    compiled = []
+    for g in globs or []:
+        negated = g.startswith('!')
+        regex, anchored = _glob_to_regex(g[1:] if negated else g)
+        compiled.append((regex, anchored, negated))
+    has_whitelist = any(not neg for _, _, neg in compiled)
+
+    def _verdict(path):
+        name = path.rsplit('/', 1)[-1]
+        for regex, anchored, negated in reversed(compiled):
+            if regex.match(path if anchored else name):
+                return not negated
+        return None
+
+    pruned = {}
+
+    def _pruned(rel_dir):
+        if rel_dir not in pruned:
+            parent = rel_dir.rpartition('/')[0]
+            pruned[rel_dir] = (bool(parent) and _pruned(parent)) or _verdict(rel_dir) is False
+        return pruned[rel_dir]
+
+    def _selected(rel_path):
+        rel_dir = rel_path.rpartition('/')[0]
+        if rel_dir and _pruned(rel_dir):
+            return False
+        verdict = _verdict(rel_path)
+        if verdict is None:
+            return not has_whitelist
+        return verdict
+
+    _selected.pruned = _pruned
+    return _selected
+
+
+def rg_search_globs(cfg=None):
+    """Globs `finder.find_matches_for` passes to ripgrep when searching the root."""
+    globs = build_rg_exclude_args(cfg)[1::2]
+    if not (cfg and (cfg.get('ripgrep_include_patterns') or cfg.get('include_globs'))):
+        globs.append('*.java')
+    return globs
+
+
+def rg_files_globs(cfg=None):
+    """Globs `run_rg_files` passes to ripgrep."""
+    return build_rg_exclude_args(cfg)[1::2] + ['*.java']
+
+
+def relative_key(path, root):
+    """``path`` relative to ``root`` as a ``/``-separated string."""
+    return Path(os.path.relpath(path, root)).as_posix()
+
+
+def select_files(root, rel_paths, globs, files_cache=None):
+    """Paths under ``root`` that a ripgrep search with ``globs`` would visit.
+
+    ``files_cache`` entries are passed to ripgrep explicitly by the callers
+    and therefore bypass globs; when given, it alone decides the selection.
+    """
+    root = Path(root)
+    if files_cache:
+        wanted = {relative_key(p, root) for p in files_cache}
+        return [root / k for k in rel_paths if k in wanted]
+    selected = _cached_glob_filter(tuple(globs))
+    return [root / k for k in rel_paths if selected(k)]
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_glob_filter(globs):
+    return rg_glob_filter(globs)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""Binary snapshot of the parsed class graph (``--save-graph``/``--load-graph``).
+
+`GraphSnapshot.build` parses every `.java` file under a root once and
+`save` writes the result as one versioned file:
+
+- a header: magic, format version, byte order, section count;
+- a section table: name, offset and size of each section;
+- the sections, 8-byte aligned: the interned name table and the file keys
+  (``\\n``-joined UTF-8), and native ``array`` buffers for the package of each
+  file, the CSR import/importer/wildcard-importer adjacency of `graph.ImportGraph`,
+  the implements and extends names (as parsed) and declaration kind of each
+  file, and the ``(mtime_ns, size)`` fingerprint of each file.
+
+`GraphSnapshot.load` memory-maps the file and wraps the arrays as
+``memoryview`` casts without copying them; only the two string tables are
+decoded. A loaded snapshot is a `graph.ImportGraph`, so it can be passed
+wherever an index is accepted, and it answers every query (reverse trees,
+imports of a class, DOT output) without reading the source tree.
+`changed_files` compares the stored fingerprints with the tree, when it is
+still there, so callers can tell that a snapshot is stale.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import rg_runner
+from graph import ImportGraph
+from idgraph import CSR, Interner
+from parser import parse_extends, parse_file, parse_package_and_imports, resolve_types
+
+MAGIC = b'JDGSNAP\x00'
+FORMAT_VERSION = 3
+
+_HEADER = struct.Struct('<8sIBxxxI')  # magic, version, big-endian flag, section count
+_SECTION = struct.Struct('<16sQQ')  # name, offset, size
+_ALIGN = 8
+
+# CSR adjacency sections: attribute -> section name prefix
+_CSRS = {'imports': 'imports', 'importers': 'importers', 'wildcard_importers': 'wildcards', 'implements': 'implements',
+         'extends': 'extends'}
+
+
+class GraphSnapshot(ImportGraph):
+    """An `ImportGraph` with class headers and file fingerprints, savable as one binary file."""
+
+    def __init__(self, root: Path):
+        super().__init__(root)
+        self.implements = CSR(array('i', [0]), array('i'))  # file id -> implements name ids, as parsed
+        self.extends = CSR(array('i', [0]), array('i'))  # file id -> extends name ids, as parsed
+        self.kind = array('i')  # file id -> name id of its declaration keyword ('' if none)
+        self.mtime_ns = array('q')
+        self.size = array('q')
+
+    @classmethod
+    def build(cls, root: Path) -> 'GraphSnapshot':
+        """Parse every `.java` file under ``root``."""
+        snap = cls(Path(root).resolve())
+        files = rg_runner.run_ripgrep(['rg', '--files', '-g', '*.java', str(root)])
+        keys = sorted({snap._key(Path(f).resolve()) for f in files})
+        names = snap.names
+        names.id('')
+        rows, cols, impl_rows, impl_cols, ext_rows, ext_cols = [], [], [], [], [], []
+        for key in keys:
+            path = snap.root / key
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            record = parse_file(path)
+            f = len(snap.keys)
+            snap.keys.append(key)
+            snap.pkg.append(names.id(record.pkg))
+            snap.kind.append(names.id(record.kind))
+            snap.mtime_ns.append(st.st_mtime_ns)
+            snap.size.append(st.st_size)
+            for imp in record.imports:
+                rows.append(f)
+                cols.append(names.id(imp))
+            for rel in record.implements:
+                impl_rows.append(f)
+                impl_cols.append(names.id(rel))
+            for rel in record.extends:
+                ext_rows.append(f)
+                ext_cols.append(names.id(rel))
+        snap._file_ids = {key: i for i, key in enumerate(snap.keys)}
+        snap.implements = CSR.from_pairs(len(snap.keys), impl_rows, impl_cols)
+        snap.extends = CSR.from_pairs(len(snap.keys), ext_rows, ext_cols)
+        snap._link(rows, cols)
+        return snap
+
+    # -- file format -------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot to ``path`` (atomically replaced)."""
+        sections = [('root', str(self.root).encode()),
+                    ('names', '\n'.join(self.names).encode()),
+                    ('keys', '\n'.join(self.keys).encode()),
+                    ('pkg', self.pkg), ('kind', self.kind)]
+        for attr, prefix in _CSRS.items():
+            csr = getattr(self, attr)
+            sections += [(prefix + '.off', csr.offsets), (prefix + '.col', csr.cols)]
+        sections += [('mtime_ns', self.mtime_ns), ('size', self.size)]
+        blobs = [(name, bytes(data) if isinstance(data, bytes) else memoryview(data).cast('B'))
+                 for name, data in sections]
+        offset = _HEADER.size + _SECTION.size * len(blobs)
+        table = []
+        for name, blob in blobs:
+            offset = -(-offset // _ALIGN) * _ALIGN
+            table.append(_SECTION.pack(name.encode(), offset, len(blob)))
+            offset += len(blob)
+        tmp = Path(f'{path}.tmp')
+        with open(tmp, 'wb') as out:
+            out.write(_HEADER.pack(MAGIC, FORMAT_VERSION, sys.byteorder == 'big', len(blobs)))
+            out.write(b''.join(table))
+            for (name, blob), entry in zip(blobs, table):
+                start = _SECTION.unpack(entry)[1]
+                out.write(bytes(start - out.tell()))
+                out.write(blob)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> 'GraphSnapshot':
+        """Memory-map a snapshot written by `save`; raises ValueError if it is not one this version reads."""
+        with open(path, 'rb') as fh:
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(buf) < _HEADER.size:
+            raise ValueError(f'{path}: not a graph snapshot')
+        magic, version, big_endian, count = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError(f'{path}: not a graph snapshot')
+        if version != FORMAT_VERSION:
+            raise ValueError(f'{path}: snapshot format {version} is not supported (expected {FORMAT_VERSION})')
+        if bool(big_endian) != (sys.byteorder == 'big'):
+            raise ValueError(f'{path}: snapshot was written on a machine with a different byte order')
+        view = memoryview(buf)
+        sections: Dict[str, memoryview] = {}
+        for i in range(count):
+            name, offset, size = _SECTION.unpack_from(buf, _HEADER.size + i * _SECTION.size)
+            sections[name.rstrip(b'\0').decode()] = view[offset:offset + size]
+
+        def text(name: str) -> List[str]:
+            data = bytes(sections[name]).decode()
+            return data.split('\n') if data else []
+
+        snap = cls(Path(bytes(sections['root']).decode()))
+        snap.names = Interner.from_unique(text('names'))
+        snap.keys = text('keys')
+        snap._file_ids = dict(zip(snap.keys, range(len(snap.keys))))
+        snap.pkg = sections['pkg'].cast('i')
+        snap.kind = sections['kind'].cast('i')
+        for attr, prefix in _CSRS.items():
+            setattr(snap, attr, CSR(sections[prefix + '.off'].cast('i'), sections[prefix + '.col'].cast('i')))
+        snap.mtime_ns = sections['mtime_ns'].cast('q')
+        snap.size = sections['size'].cast('q')
+        return snap
+
+    # -- queries answered from the snapshot ---------------------------------
+
+    def precompute_files_cache(self, cfg) -> List[Path] | None:
+        # `rg_runner.precompute_files_cache` over the stored packages
+        include_pat = cfg.get('import_include_patterns') or cfg.get('whitelist_regex')
+        if not include_pat:
+            return None
+        try:
+            pattern = re.compile(rf'^package\s+{include_pat}')
+        except re.error:
+            return None
+        no_pkg = self.names.get('')
+        res = [self.root / k for f, k in enumerate(self.keys)
+               if self.pkg[f] != no_pkg and pattern.search(f'package {self.names.name(self.pkg[f])};')]
+        return res if res else None
+
+    def parse_package_and_imports(self, path: Path) -> Tuple[str, List[str], List[str]]:
+        """Stored equivalent of `parser.parse_package_and_imports`."""
+        f = self._file_ids.get(self._key(path))
+        if f is None:
+            # not in the snapshot: parse directly
+            return parse_package_and_imports(path)
+        name = self.names.name
+        pkg = name(self.pkg[f])
+        imports = [name(i) for i in self.imports.row(f)]
+        implements = [name(i) for i in self.implements.row(f)]
+        return pkg, imports, list(resolve_types(implements, pkg, imports))
+
+    def parse_extends(self, path: Path) -> List[str]:
+        """Stored equivalent of `parser.parse_extends`."""
+        f = self._file_ids.get(self._key(path))
+        if f is None:
+            return list(parse_extends(path))
+        name = self.names.name
+        pkg = name(self.pkg[f])
+        imports = [name(i) for i in self.imports.row(f)]
+        return list(resolve_types([name(i) for i in self.extends.row(f)], pkg, imports))
+
+    def is_interface(self, path: Path) -> bool:
+        f = self._file_ids.get(self._key(path))
+        if f is None:
+            return super().is_interface(path)
+        return self.names.name(self.kind[f]) == 'interface'
+
+    def changed_files(self) -> List[str]:
+        """Keys of files whose ``(mtime_ns, size)`` differs from the snapshot or that are gone."""
+        changed = []
+        for f, key in enumerate(self.keys):
+            try:
+                st = os.stat(self.root / key)
+            except OSError:
+                changed.append(key)
+                continue
+            if st.st_mtime_ns != self.mtime_ns[f] or st.st_size != self.size[f]:
+                changed.append(key)
+        return changed
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Synthetic Java monorepo generator for tests and benchmarks.
+
+Builds a deterministic (seeded) source tree under ``root``:
+
+- ``packages`` packages ``com.synth.p<i>`` holding ``classes`` top-level types
+  named ``Type<n>``;
+- a ``interface_ratio`` share of them are interfaces, and a ``impl_ratio``
+  share of those get a ``Type<n>Impl`` in ``com.synth.p<i>.impl`` that
+  imports and implements its interface;
+- every type imports between ``fan_out[0]`` and ``fan_out[1]`` other types,
+  chosen with Zipf-like popularity (weight ``1 / rank ** fan_in_skew``), so a
+  few types have a very large fan-in and most have a small one;
+- a ``wildcard_ratio`` share of imports use ``import <pkg>.*;``;
+- ``cycles`` import cycles of ``cycle_length`` types each are added on top.
+
+Usage::
+
+    python synth_repo.py OUT_DIR --classes 5000 --packages 200 --seed 1
+
+The matching ``java-dep-graph.conf`` is written to OUT_DIR as well, so the
+CLI can be run from there directly.
+"""
+from __future__ import annotations
+
+import argparse
+import bisect
+import itertools
+import random
+from pathlib import Path
+from typing import Dict, List
+
+BASE_PACKAGE = 'com.synth'
+
+CONF = f"""import_include_patterns=^{BASE_PACKAGE.replace('.', '[.]')}[.].*
+import_exclude_patterns=^java[.]|^javax[.]
+ripgrep_exclude_patterns=!**/test/**
+"""
+
+
+def generate(
+    root: Path,
+    classes: int = 1000,
+    packages: int = 50,
+    fan_out=(0, 4),
+    fan_in_skew: float = 1.0,
+    interface_ratio: float = 0.5,
+    impl_ratio: float = 0.8,
+    wildcard_ratio: float = 0.1,
+    cycles: int = 5,
+    cycle_length: int = 3,
+    seed: int = 1,
+) -> Dict[str, int]:
+    """Write the tree under ``root`` and return counts of what was generated."""
+    root = Path(root)
+    rnd = random.Random(seed)
+    packages = max(1, min(packages, classes))
+    names = [f'Type{n}' for n in range(classes)]
+    pkg_of = [f'{BASE_PACKAGE}.p{rnd.randrange(packages)}' for _ in range(classes)]
+    is_interface = [rnd.random() < interface_ratio for _ in range(classes)]
+    has_impl = [iface and rnd.random() < impl_ratio for iface in is_interface]
+
+    # popularity: a random rank per type, Zipf-like weights by rank
+    ranks = list(range(classes))
+    rnd.shuffle(ranks)
+    cumulative = list(itertools.accumulate(1.0 / (r + 1) ** fan_in_skew for r in ranks))
+
+    def pick() -> int:
+        return bisect.bisect_left(cumulative, rnd.random() * cumulative[-1])
+
+    imports: List[List[int]] = []
+    for n in range(classes):
+        wanted = min(classes - 1, rnd.randint(*fan_out))
+        deps: List[int] = []
+        for _ in range(wanted * 20):
+            if len(deps) == wanted:
+                break
+            d = pick()
+            if d != n and d not in deps:
+                deps.append(d)
+        imports.append(deps)
+    for _ in range(cycles if classes >= cycle_length > 1 else 0):
+        ring = rnd.sample(range(classes), cycle_length)
+        for a, b in zip(ring, ring[1:] + ring[:1]):
+            if b not in imports[a]:
+                imports[a].append(b)
+
+    def import_lines(deps: List[int]) -> List[str]:
+        lines = []
+        for d in deps:
+            if rnd.random() < wildcard_ratio:
+                lines.append(f'import {pkg_of[d]}.*;')
+            else:
+                lines.append(f'import {pkg_of[d]}.{names[d]};')
+        return sorted(set(lines))
+
+    def write(pkg: str, name: str, body: str) -> None:
+        d = root / 'src/main/java' / pkg.replace('.', '/')
+        d.mkdir(parents=True, exist_ok=True)
+        (d / f'{name}.java').write_text(body)
+
+    counts = {'files': 0, 'interfaces': 0, 'impls': 0, 'imports': 0, 'wildcard_imports': 0}
+    for n in range(classes):
+        lines = import_lines(imports[n])
+        counts['imports'] += len(lines)
+        counts['wildcard_imports'] += sum(line.endswith('.*;') for line in lines)
+        kind = 'interface' if is_interface[n] else 'class'
+        member = '    void run();' if is_interface[n] else '    public void run() {\n    }'
+        write(pkg_of[n], names[n], f'package {pkg_of[n]};\n\n' + ''.join(f'{line}\n' for line in lines)
+              + f'import java.util.List;\n\n/**\n * Synthetic {kind} {names[n]}.\n */\n'
+              + f'public {kind} {names[n]} {{\n{member}\n}}\n')
+        counts['files'] += 1
+        counts['interfaces'] += is_interface[n]
+        if has_impl[n]:
+            impl_pkg = f'{pkg_of[n]}.impl'
+            impl_deps = [d for d in imports[n] if rnd.random() < 0.5]
+            lines = sorted(set([f'import {pkg_of[n]}.{names[n]};'] + import_lines(impl_deps)))
+            counts['imports'] += len(lines)
+            write(impl_pkg, f'{names[n]}Impl', f'package {impl_pkg};\n\n' + ''.join(f'{line}\n' for line in lines)
+                  + f'\npublic class {names[n]}Impl\n    implements {names[n]} {{\n'
+                  + '    public void run() {\n    }\n}\n')
+            counts['files'] += 1
+            counts['impls'] += 1
+    # one test class, which traversals must skip
+    test_dir = root / 'src/test/java/com/synth/test'
+    test_dir.mkdir(parents=True, exist_ok=True)
+    (test_dir / 'Type0Test.java').write_text(
+        f'package {BASE_PACKAGE}.test;\n\nimport {pkg_of[0]}.{names[0]};\n\npublic class Type0Test {{\n}}\n')
+    counts['files'] += 1
+    (root / 'java-dep-graph.conf').write_text(CONF)
+    return counts
+
+
+def classes_for_files(files: int, interface_ratio: float = 0.5, impl_ratio: float = 0.8) -> int:
+    """Number of top-level types that yields about ``files`` files."""
+    return max(1, round(files / (1 + interface_ratio * impl_ratio)))
+
+
+def main():
+    argp = argparse.ArgumentParser(description='Generate a synthetic Java source tree')
+    argp.add_argument('root')
+    argp.add_argument('--classes', type=int, default=1000, help='Top-level types, not counting Impl classes')
+    argp.add_argument('--files', type=int, help='Approximate total number of files (overrides --classes)')
+    argp.add_argument('--packages', type=int, default=50)
+    argp.add_argument('--fan-out', default='0-4', help='Imports per type, as MIN-MAX (default: %(default)s)')
+    argp.add_argument('--fan-in-skew', type=float, default=1.0,
+                      help='Zipf exponent of import target popularity; 0 spreads imports evenly (default: %(default)s)')
+    argp.add_argument('--interface-ratio', type=float, default=0.5)
+    argp.add_argument('--impl-ratio', type=float, default=0.8, help='Share of interfaces with an Impl class')
+    argp.add_argument('--wildcard-ratio', type=float, default=0.1)
+    argp.add_argument('--cycles', type=int, default=5)
+    argp.add_argument('--cycle-length', type=int, default=3)
+    argp.add_argument('--seed', type=int, default=1)
+    args = argp.parse_args()
+    lo, _, hi = args.fan_out.partition('-')
+    classes = args.classes
+    if args.files:
+        classes = classes_for_files(args.files, args.interface_ratio, args.impl_ratio)
+    counts = generate(Path(args.root), classes=classes, packages=args.packages, fan_out=(int(lo), int(hi or lo)),
+                      fan_in_skew=args.fan_in_skew, interface_ratio=args.interface_ratio,
+                      impl_ratio=args.impl_ratio, wildcard_ratio=args.wildcard_ratio,
+                      cycles=args.cycles, cycle_length=args.cycle_length, seed=args.seed)
+    print(', '.join(f'{v} {k}' for k, v in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for batch reverse queries (--targets-file) and the lookups shared by
+the traversals of one run.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from acme_tree import SCRIPT, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_targets_file_prints_the_single_target_trees(tmp_path):
+    root = make_tree(tmp_path)
+    targets = ['com.acme.api.Pricing', 'QuoteService', 'com.acme.svc.Checkout']
+    (tmp_path / 'targets.txt').write_text('\n'.join(targets) + '\n# not a target\n')
+    expected = '\n'.join(run(tmp_path, str(root), t, '--reverse', '--levels', '1') for t in targets)
+    assert run(tmp_path, str(root), '--targets-file', 'targets.txt', '--levels', '1') == expected
+    records = [json.loads(line) for line in
+               run(tmp_path, str(root), '--targets-file', 'targets.txt', '--levels', '1', '--jsonl').splitlines()]
+    assert [r['fqn'] for r in records] == ['com.acme.api.Pricing', 'com.acme.svc.QuoteService', 'com.acme.svc.Checkout']
+    assert records[0]['tree'][0] == 'com.acme.api.Pricing'
+    single = run(tmp_path, str(root), 'com.acme.api.Pricing', '--reverse', '--levels', '1').splitlines()
+    assert records[0]['tree'] == single[:-1]
+    assert single[-1] == f"Dependents found: {records[0]['dependents']}"
+    (tmp_path / 'binary.txt').write_bytes(b'\xff\xfe\x00')
+    for path in ('missing.txt', 'binary.txt'):
+        result = subprocess.run([sys.executable, str(SCRIPT), str(root), '--targets-file', path],
+                                capture_output=True, text=True, cwd=tmp_path)
+        assert result.returncode == 1
+        assert f'Error: cannot read targets from {path}' in result.stderr and 'Traceback' not in result.stderr
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_top_extras_traversals_search_each_node_once(tmp_path, monkeypatch, capsys):
+    import finder
+    import java_dep_graph
+    import parser
+
+    root = tmp_path / 'repo'
+    pkg = root / 'src/main/java/com/acme/shapes'
+    pkg.mkdir(parents=True)
+    (pkg / 'Shape.java').write_text('package com.acme.shapes;\n\npublic interface Shape {\n}\n')
+    for name in ('Circle', 'Square', 'Triangle'):
+        (pkg / f'{name}.java').write_text(
+            f'package com.acme.shapes;\n\nimport com.acme.shapes.Shape;\n\npublic class {name}\n  implements Shape {{\n}}\n')
+    (pkg / 'Canvas.java').write_text('package com.acme.shapes;\n\nimport com.acme.shapes.Circle;\n'
+                                     'import com.acme.shapes.Square;\nimport com.acme.shapes.Triangle;\n\n'
+                                     'public class Canvas {\n}\n')
+    (pkg / 'App.java').write_text('package com.acme.shapes;\n\nimport com.acme.shapes.Canvas;\n\npublic class App {\n}\n')
+
+    searched = []
+    search = finder.find_matches_for
+    monkeypatch.setattr(finder, 'find_matches_for', lambda cur, *a, **kw: searched.append(cur) or search(cur, *a, **kw))
+    cfg = {'import_include_patterns': '^com[.]acme[.]'}
+    java_dep_graph.reverse_dependants(root, 'com.acme.shapes.Shape', cfg, sort_strategy='lex')
+    assert 'com.acme.shapes.App' in capsys.readouterr().out
+    assert sorted(searched) == sorted(set(searched))
+    # parsed headers are kept within the parse cache bound
+    memo = finder.DependentsMemo(maxsize=2)
+    files = sorted(pkg.iterdir())
+    for f in files + files[-1:]:
+        memo.parse(f)
+    assert list(memo.headers) == files[-2:]
+    assert finder.DependentsMemo().maxsize == parser.PARSE_CACHE.maxsize
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the synthetic tree generator and the benchmark harness.
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import synth_repo
+
+HERE = Path(__file__).parent
+
+
+def sources(root):
+    return {str(p.relative_to(root)): p.read_text() for p in sorted(root.rglob('*.java'))}
+
+
+def test_generate_is_deterministic_and_counts_files(tmp_path):
+    counts = synth_repo.generate(tmp_path / 'a', classes=120, packages=8, wildcard_ratio=0.3, seed=7)
+    synth_repo.generate(tmp_path / 'b', classes=120, packages=8, wildcard_ratio=0.3, seed=7)
+    a = sources(tmp_path / 'a')
+    assert a == sources(tmp_path / 'b')
+    assert counts['files'] == len(a)
+    assert counts['impls'] == sum(name.endswith('Impl.java') for name in a)
+    assert counts['wildcard_imports'] > 0
+    assert (tmp_path / 'a' / 'java-dep-graph.conf').exists()
+
+
+def test_generate_adds_import_cycles(tmp_path):
+    synth_repo.generate(tmp_path, classes=30, packages=3, fan_out=(0, 0), interface_ratio=0,
+                        cycles=1, cycle_length=3, wildcard_ratio=0)
+    edges = {}
+    for path, text in sources(tmp_path).items():
+        if '/test/' in path:
+            continue
+        name = Path(path).stem
+        edges[name] = [line.rsplit('.', 1)[1].rstrip(';') for line in text.splitlines()
+                       if line.startswith('import com.synth.')]
+    ring = [n for n, deps in edges.items() if deps]
+    assert len(ring) == 3
+    # following the single import of each ring member comes back to the start
+    cur = ring[0]
+    for _ in range(3):
+        cur = edges[cur][0]
+    assert cur == ring[0]
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_benchmark_writes_results(tmp_path):
+    out = tmp_path / 'bench.json'
+    subprocess.run([sys.executable, str(HERE / 'benchmark.py'), '--sizes', '60', '--targets', '2', '--levels', '2',
+                    '--workdir', str(tmp_path / 'trees'), '--out', str(out)], check=True, capture_output=True)
+    report = json.loads(out.read_text())
+    assert report['environment']['python']
+    records = report['results']
+    assert {(r['engine'], r['op']) for r in records} >= {('rg-per-node', 'reverse'), ('graph', 'setup'),
+                                                          ('index', 'dot'), ('rg-frontier', 'imports')}
+    assert all(r['seconds'] >= 0 for r in records)
+    assert any(r['rg_calls'] for r in records if r['engine'] == 'rg-per-node' and r['op'] == 'reverse')
+    assert any(r['native_scans'] for r in records if r['backend'] == 'native' and r['engine'] == 'rg-per-node')
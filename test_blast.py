@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+E2E test for --all-blast-radius.
+"""
+
+import json
+import shutil
+
+import pytest
+
+from acme_tree import add_generic_repo, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'index'])
+def test_all_blast_radius_counts_transitive_dependents(tmp_path, engine):
+    root = make_tree(tmp_path)
+    assert run(tmp_path, str(root), '--all-blast-radius', '--engine', engine).splitlines() == [
+        'class,dependents,direct',
+        'com.acme.api.Pricing,4,3',
+        'com.acme.api.Quote,2,1',
+        'com.acme.svc.QuoteService,1,1',
+        'com.acme.impl.PricingImpl,0,0',
+        'com.acme.svc.Checkout,0,0',
+    ]
+    run(tmp_path, str(root), '--all-blast-radius', 'radius.json', '--levels', '1', '--engine', engine)
+    rows = json.loads((tmp_path / 'radius.json').read_text())
+    assert rows[0] == {'class': 'com.acme.api.Pricing', 'dependents': 3, 'direct': 3}
+    # a same-package subclass depends on its superclass without importing it
+    (root / 'src/main/java/com/acme/svc/Premium.java').write_text(
+        'package com.acme.svc;\n\npublic class Premium extends Checkout {\n}\n')
+    lines = run(tmp_path, str(root), '--all-blast-radius', '--engine', engine).splitlines()
+    assert 'com.acme.svc.Checkout,1,1' in lines and 'com.acme.api.Pricing,5,3' in lines
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'index'])
+def test_all_blast_radius_credits_the_superclass_of_a_bounded_generic(tmp_path, engine):
+    root = make_tree(tmp_path)
+    add_generic_repo(root)
+    lines = run(tmp_path, str(root), '--all-blast-radius', '--engine', engine).splitlines()
+    assert 'com.acme.repo.BaseRepo,1,1' in lines
+    assert 'com.acme.repo.Entity,0,0' in lines
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+E2E test for the import cycle report (--cycles).
+"""
+
+import shutil
+
+import pytest
+
+from acme_tree import make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_cycles_lists_import_cycles_largest_first(tmp_path):
+    root = make_tree(tmp_path)
+    svc = root / 'src/main/java/com/acme/svc'
+    (svc / 'QuoteService.java').write_text(
+        'package com.acme.svc;\n\nimport com.acme.svc.Checkout;\n\npublic class QuoteService {\n}\n')
+    (svc / 'Billing.java').write_text('package com.acme.svc;\n\nimport com.acme.api.Quote;\n\npublic class Billing {\n}\n')
+    (root / 'src/main/java/com/acme/api/Quote.java').write_text(
+        'package com.acme.api;\n\nimport com.acme.svc.Billing;\n\npublic interface Quote {\n}\n')
+    expected = ('Cycle 1: 2 classes\n  com.acme.api.Quote\n  com.acme.svc.Billing\n'
+                'Cycle 2: 2 classes\n  com.acme.svc.Checkout\n  com.acme.svc.QuoteService\nCycles found: 2\n')
+    assert run(tmp_path, str(root), '--cycles', '--engine', 'graph') == expected
+    assert run(tmp_path, str(root), '--cycles', '1').splitlines()[-2:] == ['  com.acme.svc.Billing', 'Cycles found: 2']
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+E2E test for the query daemon (--serve) and its client (--connect).
+"""
+
+import json
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from acme_tree import SCRIPT, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_daemon_answers_like_the_cli(tmp_path):
+    root = make_tree(tmp_path)
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = str(s.getsockname()[1])
+    server = subprocess.Popen([sys.executable, str(SCRIPT), str(root), '--serve', '--port', port],
+                              cwd=tmp_path, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/status')
+                break
+            except OSError:
+                time.sleep(0.1)
+        (tmp_path / 'targets.txt').write_text('com.acme.api.Pricing\nQuoteService\n')
+        for args in (['com.acme.api.Pricing', '--reverse', '--levels', '1'], ['QuoteService'], [], ['--cycles'],
+                     ['--targets-file', 'targets.txt'], ['--all-blast-radius', '--levels', '1'],
+                     ['--all-blast-radius=-.json']):
+            expected = run(tmp_path, str(root), *args)
+            assert run(tmp_path, str(root), *args, '--connect', '--port', port) == expected
+        # changed files are picked up before the next query
+        (root / 'src/main/java/com/acme/svc/Billing.java').write_text(
+            'package com.acme.svc;\n\nimport com.acme.api.Quote;\n\npublic class Billing {\n}\n')
+        answer = run(tmp_path, str(root), 'com.acme.api.Quote', '--reverse', '--connect', '--port', port)
+        assert 'com.acme.svc.Billing' in answer
+        assert answer == run(tmp_path, str(root), 'com.acme.api.Quote', '--reverse')
+        # a report file is written by the client, not the daemon
+        run(tmp_path, str(root), '--all-blast-radius', 'cli.json')
+        run(tmp_path, str(root), '--all-blast-radius', 'daemon.json', '--connect', '--port', port)
+        assert (tmp_path / 'daemon.json').read_text() == (tmp_path / 'cli.json').read_text()
+        # options the daemon does not forward are refused rather than dropped
+        result = subprocess.run([sys.executable, str(SCRIPT), str(root), '--connect', '--port', port,
+                                 '--engine', 'graph'], capture_output=True, text=True, cwd=tmp_path)
+        assert result.returncode == 2 and '--connect does not support --engine' in result.stderr
+        # browser-style requests are refused before any query runs
+        body = json.dumps({'root': str(root), 'target': 'QuoteService'}).encode()
+        for headers, code in (({'Content-Type': 'text/plain'}, 415),
+                              ({'Content-Type': 'application/json', 'Origin': 'http://evil.example'}, 403),
+                              ({'Content-Type': 'application/json', 'Host': f'evil.example:{port}'}, 403)):
+            req = urllib.request.Request(f'http://127.0.0.1:{port}/query', data=body, headers=headers)
+            with pytest.raises(urllib.error.HTTPError) as refused:
+                urllib.request.urlopen(req)
+            assert refused.value.code == code
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+E2E tests for the other ways of looking up dependents: each prints exactly
+what one rg search per node prints.
+"""
+
+import shutil
+
+import pytest
+
+from acme_tree import make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('target', ['com.acme.api.Pricing', 'com.acme.svc.QuoteService'])
+def test_graph_engine_matches_ripgrep_output(tmp_path, target):
+    root = make_tree(tmp_path)
+    expected = run(tmp_path, str(root), target, '--reverse')
+    assert run(tmp_path, str(root), target, '--reverse', '--engine', 'graph') == expected
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('target', ['com.acme.api.Pricing', 'com.acme.svc.QuoteService'])
+def test_rg_frontier_engine_matches_ripgrep_output(tmp_path, target):
+    root = make_tree(tmp_path)
+    expected = run(tmp_path, str(root), target, '--reverse')
+    assert run(tmp_path, str(root), target, '--reverse', '--engine', 'rg-frontier') == expected
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('target', ['com.acme.api.Pricing', 'com.acme.svc.QuoteService'])
+def test_concurrent_rg_lookups_match_sequential_output(tmp_path, target):
+    root = make_tree(tmp_path)
+    expected = run(tmp_path, str(root), target, '--reverse')
+    with open(tmp_path / 'java-dep-graph.conf', 'a') as conf:
+        conf.write('rg_concurrency=4\n')
+    assert run(tmp_path, str(root), target, '--reverse') == expected
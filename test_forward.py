@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+E2E test for --forward.
+"""
+
+import shutil
+
+import pytest
+
+from acme_tree import add_generic_repo, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_forward_prints_transitive_imports(tmp_path):
+    root = make_tree(tmp_path)
+    expected = 'com.acme.svc.Checkout\n1- com.acme.svc.QuoteService\n  2- com.acme.api.*\nDependencies found: 2\n'
+    assert run(tmp_path, str(root), 'Checkout', '--forward') == expected
+    assert run(tmp_path, str(root), 'com.acme.svc.Checkout', '--forward', '--index') == expected
+    assert run(tmp_path, str(root), 'Checkout', '--forward', '--levels', '1').endswith('Dependencies found: 1\n')
+    # the implemented interface is listed once even though it is also imported
+    assert run(tmp_path, str(root), 'PricingImpl', '--forward', '--engine', 'graph') == \
+        'com.acme.impl.PricingImpl\n1- com.acme.api.Pricing\nDependencies found: 1\n'
+    # a same-package superclass needs no import line
+    (root / 'src/main/java/com/acme/svc/Premium.java').write_text(
+        'package com.acme.svc;\n\npublic class Premium extends Checkout {\n}\n')
+    for engine in ('rg-per-node', 'graph', 'index'):
+        assert run(tmp_path, str(root), 'Premium', '--forward', '--levels', '1', '--engine', engine) == \
+            'com.acme.svc.Premium\n1- com.acme.svc.Checkout\nDependencies found: 1\n'
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'graph', 'index'])
+def test_forward_follows_the_superclass_of_a_bounded_generic(tmp_path, engine):
+    root = make_tree(tmp_path)
+    add_generic_repo(root)
+    assert run(tmp_path, str(root), 'com.acme.repo.Repo', '--forward', '--engine', engine) == \
+        'com.acme.repo.Repo\n1- com.acme.repo.BaseRepo\nDependencies found: 1\n'
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Unit tests for idgraph.py: interning, CSR packing, child trees and SCC condensation.
+"""
+
+import random
+
+from idgraph import CSR, ChildTree, Condensation, EdgeList, Interner, strongly_connected
+
+
+def test_csr_rows_keep_input_order_and_transpose():
+    csr = CSR.from_pairs(3, [2, 0, 2, 0], [1, 2, 0, 1])
+    assert [list(csr.row(i)) for i in range(3)] == [[2, 1], [], [1, 0]]
+    assert list(csr.row(-1)) == [] and list(csr.row(3)) == []
+    back = csr.transpose(3)
+    assert [list(back.row(i)) for i in range(3)] == [[2], [0, 2], [0]]
+
+
+def test_child_tree_from_edges_dedupes_and_sorts():
+    names = Interner(['t', 'b', 'a'])
+    edges = EdgeList()
+    edges.add(0, 1, 1)
+    edges.add(0, 1, 2)
+    edges.add(0, 2, 1)  # repeated link: the first one wins
+    edges.add(1, 2, 2)
+    edges.delete(1, {2})
+    tree = ChildTree.from_edges(edges, names)
+    assert list(tree.get(0)) == [(1, 1), (1, 2)]
+    assert list(tree.get(1)) == []
+    lex = ChildTree.from_edges(edges, names, sort_lex=True)
+    assert [names.name(c) for _, c in lex.get(0)] == ['a', 'b']
+
+
+def test_child_tree_from_dict_matches_dict():
+    children = {'t': [(1, 'b'), (1, 'a')], 'a': [(2, 'c')], 'c': []}
+    tree = ChildTree.from_dict(children)
+    for parent, lst in children.items():
+        got = [(lvl, tree.names.name(c)) for lvl, c in tree.get(tree.names.get(parent))]
+        assert got == lst
+    assert list(tree.get(tree.names.get('missing'))) == []
+
+
+def test_condensation_matches_brute_force_reachability():
+    rnd = random.Random(5)
+    for _ in range(50):
+        n = rnd.randint(1, 30)
+        pairs = sorted({(rnd.randrange(n), rnd.randrange(n)) for _ in range(rnd.randint(0, 3 * n))})
+        graph = CSR.from_pairs(n, [a for a, _ in pairs], [b for _, b in pairs])
+        reaches = []
+        for v in range(n):
+            seen, todo = set(), [v]
+            while todo:
+                for w in graph.row(todo.pop()):
+                    if w not in seen:
+                        seen.add(w)
+                        todo.append(w)
+            reaches.append(seen)
+        comp, count = strongly_connected(graph)
+        condensed = Condensation(graph)
+        for v in range(n):
+            for w in range(n):
+                same = v == w or (w in reaches[v] and v in reaches[w])
+                assert (comp[v] == comp[w]) == same
+                if w in reaches[v] and comp[v] != comp[w]:
+                    assert comp[w] < comp[v]
+            dependents = {u for u in range(n) if u != v and v in reaches[u]}
+            assert condensed.dependents(v) == sum(1 << u for u in dependents)
+        assert sum(len(m) for m in condensed.cycles()) == sum(
+            1 for v in range(n) if any(comp[w] == comp[v] for w in range(n) if w != v))
+
+
+def test_strongly_connected_handles_chains_deeper_than_the_recursion_limit():
+    n = 5000
+    ring = CSR.from_pairs(n, range(n), [(i + 1) % n for i in range(n)])
+    assert strongly_connected(ring)[1] == 1
+    chain = CSR.from_pairs(n, range(n - 1), range(1, n))
+    comp, count = strongly_connected(chain)
+    assert count == n and comp[0] == n - 1
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+E2E test for change-set impact analysis (--impact).
+"""
+
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from acme_tree import SCRIPT, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None or shutil.which('git') is None, reason='ripgrep or git not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'index'])
+def test_impact_lists_classes_affected_by_a_commit(tmp_path, engine):
+    root = make_tree(tmp_path)
+
+    def git(*args):
+        subprocess.run(['git', '-c', 'user.name=t', '-c', 'user.email=t@t', *args], cwd=root, check=True,
+                       capture_output=True)
+
+    git('init', '-q')
+    git('add', '.')
+    git('commit', '-qm', 'base')
+    (root / 'src/main/java/com/acme/api/Pricing.java').write_text(
+        'package com.acme.api;\n\npublic interface Pricing {\n  int price();\n}\n')
+    (root / 'src/test/java/com/acme/PricingTest.java').write_text('package com.acme;\n')
+    git('commit', '-qam', 'change')
+    assert run(tmp_path, str(root), '--impact', 'HEAD~1..HEAD', '--engine', engine) == (
+        'com.acme.api.Pricing (changed)\n'
+        'com.acme.api.Quote <- com.acme.api.Pricing (1)\n'
+        'com.acme.impl.PricingImpl <- com.acme.api.Pricing (1)\n'
+        'com.acme.svc.Checkout <- com.acme.api.Pricing (2)\n'
+        'com.acme.svc.QuoteService <- com.acme.api.Pricing (1)\n'
+        'Affected classes: 4\n')
+    records = [json.loads(line) for line in
+               run(tmp_path, str(root), '--impact', 'HEAD~1..HEAD', '--levels', '1', '--jsonl').splitlines()[:-1]]
+    assert [r['class'] for r in records] == ['com.acme.api.Pricing', 'com.acme.api.Quote', 'com.acme.impl.PricingImpl',
+                                             'com.acme.svc.QuoteService']
+    assert records[-1]['level'] == 1
+    # revisions are validated before git sees them: no option injection, no traceback
+    for rev_range in (f'--output={tmp_path}/pwned..HEAD', f'HEAD..--output={tmp_path}/pwned', 'HEAD~1..',
+                      'nope..HEAD', f'--output={tmp_path}/pwned'):
+        result = subprocess.run([sys.executable, str(SCRIPT), str(root), f'--impact={rev_range}'],
+                                capture_output=True, text=True, cwd=tmp_path)
+        assert result.returncode == 1
+        assert 'Error: ' in result.stderr and 'Traceback' not in result.stderr
+    assert not (tmp_path / 'pwned').exists()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+E2E test for the persistent import index (--index).
+Builds a tiny Java tree and checks that index-backed queries print exactly
+what the ripgrep-backed queries print.
+"""
+
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from index import ImportIndex
+from acme_tree import SCRIPT, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('target', ['com.acme.api.Pricing', 'com.acme.impl.PricingImpl', 'com.acme.svc.QuoteService'])
+@pytest.mark.parametrize('levels', ['0', '1'])
+def test_index_matches_ripgrep_output(tmp_path, target, levels):
+    root = make_tree(tmp_path)
+    expected = run(tmp_path, str(root), target, '--reverse', '--levels', levels)
+    assert 'Dependents found' in expected
+    assert run(tmp_path, str(root), target, '--reverse', '--levels', levels, '--index') == expected
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_build_index_writes_cache_dir(tmp_path):
+    root = make_tree(tmp_path)
+    run(tmp_path, str(root), '--build-index')
+    assert (root / '.java-dep-graph' / 'index.sqlite3').exists()
+    assert run(tmp_path, str(root), 'QuoteService', '--index') == 'com.acme.api.*\n'
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_refresh_index_picks_up_changes(tmp_path):
+    root = make_tree(tmp_path)
+    run(tmp_path, str(root), '--build-index')
+    (root / 'src/main/java/com/acme/svc/Checkout.java').unlink()
+    (root / 'src/main/java/com/acme/svc/Billing.java').write_text(
+        'package com.acme.svc;\n\nimport com.acme.api.Quote;\n\npublic class Billing {\n}\n')
+    result = subprocess.run([sys.executable, str(SCRIPT), str(root), '--refresh-index'],
+                            capture_output=True, text=True, cwd=tmp_path)
+    assert '1 added, 0 updated, 1 removed' in result.stderr
+    expected = run(tmp_path, str(root), 'com.acme.api.Quote', '--reverse')
+    assert 'com.acme.svc.Billing' in expected
+    assert run(tmp_path, str(root), 'com.acme.api.Quote', '--reverse', '--index') == expected
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_index_resolves_stored_extends(tmp_path):
+    root = make_tree(tmp_path)
+    premium = root / 'src/main/java/com/acme/svc/Premium.java'
+    premium.write_text('package com.acme.svc;\n\npublic class Premium extends Checkout {\n}\n')
+    index = ImportIndex.build(root)
+    try:
+        assert index.parse_extends(premium) == ['com.acme.svc.Checkout']
+        assert index.parse_extends(root / 'src/main/java/com/acme/svc/Checkout.java') == []
+    finally:
+        index.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Unit tests for native_scan.py: the in-process scan backend answers the
+ripgrep command lines the tool builds like ripgrep does.
+"""
+
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import rg_runner
+from graph import _HEADER_LINE_RG
+from native_scan import NativeBackend
+
+SCRIPT = Path(__file__).parent / 'java_dep_graph.py'
+
+SOURCES = {
+    'src/main/java/a/Api.java': 'package a;\n\npublic interface Api {\n}\n',
+    'src/main/java/a/Impl.java': 'package a;\n\n\n  import a.Api;\n\npublic class Impl implements Api {\n}\n',
+    'src/main/java/b/Service.java': 'package b;\n\nimport a.*;\n\npublic class Service {\n}\n',
+    'src/test/java/a/ApiTest.java': 'package a;\n\nimport a.Api;\n\npublic class ApiTest {\n}\n',
+    '.hidden/Skipped.java': 'package h;\n\nimport a.Api;\n',
+    'notes.txt': 'import a.Api;\n',
+}
+
+
+def make_tree(tmp_path):
+    root = tmp_path / 'repo'
+    for rel, text in SOURCES.items():
+        f = root / rel
+        f.parent.mkdir(parents=True, exist_ok=True)
+        f.write_text(text)
+    return root
+
+
+def keys(paths, root):
+    return sorted(rg_runner.relative_key(p, root) for p in paths)
+
+
+def test_native_backend_lists_and_searches_like_ripgrep_globs(tmp_path):
+    root = make_tree(tmp_path)
+    native = NativeBackend(workers=2)
+    files = native.paths(['rg', '-g', '!**/test/**', '--files', '-g', '*.java', str(root)])
+    assert keys(files, root) == ['src/main/java/a/Api.java', 'src/main/java/a/Impl.java', 'src/main/java/b/Service.java']
+    matches = native.paths(['rg', '--files-with-matches', '-F', '-e', 'import a.Api;', '-e', 'import a.*;',
+                            '-g', '*.java', str(root)])
+    assert keys(matches, root) == ['src/main/java/a/Impl.java', 'src/main/java/b/Service.java',
+                                   'src/test/java/a/ApiTest.java']
+    # `\s*` must not carry a match over the blank lines before the import
+    hits = native.lines(['rg', '--json', '-g', '*.java', '-e', _HEADER_LINE_RG,
+                         str(root / 'src/main/java/a/Impl.java')])
+    assert [line for _, line in hits] == ['package a;', '  import a.Api;']
+    with pytest.raises(RuntimeError):
+        native.paths(['rg', '--files', '--hidden', str(root)])
+
+
+def test_incomplete_scan_backend_cannot_be_instantiated():
+    class PathsOnly(rg_runner.ScanBackend):
+        def paths(self, cmd):
+            return []
+
+    with pytest.raises(TypeError):
+        PathsOnly()
+
+
+def test_native_listing_is_reused_until_a_directory_changes(tmp_path):
+    root = make_tree(tmp_path)
+    native = NativeBackend()
+    cmd = ['rg', '--files', '-g', '*.java', str(root)]
+    assert len(native.paths(cmd)) == 4
+    (root / 'src/main/java/b/Extra.java').write_text('package b;\n')
+    assert len(native.paths(cmd)) == 5
+
+
+def test_native_backend_serves_concurrent_callers(tmp_path):
+    root = make_tree(tmp_path)
+    native = NativeBackend(workers=2)
+    pool = native._pool
+    cmd = ['rg', '--files-with-matches', '-F', '-e', 'import a.Api;', '-g', '*.java', str(root)]
+    with ThreadPoolExecutor(8) as callers:
+        results = list(callers.map(lambda _: keys(native.paths(cmd), root), range(32)))
+    assert results == [results[0]] * 32 and len(results[0]) == 2
+    assert native._pool is pool and len(native._listings) == 1
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'rg-frontier', 'graph'])
+def test_native_scan_backend_matches_ripgrep_output(tmp_path, engine):
+    root = make_tree(tmp_path)
+    outputs = []
+    for backend in ('rg', 'native'):
+        (tmp_path / 'java-dep-graph.conf').write_text(f'import_include_patterns=^[ab][.]\nscan_backend={backend}\n')
+        result = subprocess.run([sys.executable, str(SCRIPT), str(root), 'a.Api', '--reverse', '--engine', engine],
+                                capture_output=True, text=True, cwd=tmp_path)
+        assert result.returncode == 0, result.stderr
+        outputs.append(result.stdout)
+    assert 'b.Service' in outputs[0]
+    assert outputs[1] == outputs[0]
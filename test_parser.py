@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Unit tests for parser.py: header parsing and the parse cache.
+"""
+
+import os
+
+import pytest
+
+import parser
+
+IMPL = """package com.acme.impl;
+
+import com.acme.api.Pricing;
+import com.acme.base.*;
+
+public class PricingImpl
+    extends AbstractPricing
+    implements Pricing, java.io.Serializable {
+}
+"""
+
+
+def write(tmp_path, name, text):
+    f = tmp_path / name
+    f.write_text(text)
+    return f
+
+
+def test_parse_file_record(tmp_path):
+    rec = parser.parse_file(write(tmp_path, 'PricingImpl.java', IMPL))
+    assert rec.pkg == 'com.acme.impl'
+    assert rec.imports == ('com.acme.api.Pricing', 'com.acme.base.*')
+    assert rec.wildcard_pkgs == ('com.acme.base',)
+    assert rec.implements == ('com.acme.api.Pricing', 'java.io.Serializable')
+    # only a wildcard import could qualify it: left for `resolve_type`
+    assert rec.extends == ('AbstractPricing',)
+    assert rec.kind == 'class'
+    with pytest.raises(AttributeError):
+        rec.pkg = 'other'
+
+
+def test_parse_cache_hits_and_mtime_invalidation(tmp_path):
+    f = write(tmp_path, 'PricingImpl.java', IMPL)
+    cache = parser.ParseCache(maxsize=8)
+    first = cache.get(f)
+    assert cache.get(f) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    f.write_text(IMPL.replace('com.acme.impl', 'com.acme.other'))
+    st = os.stat(f)
+    os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.get(f).pkg == 'com.acme.other'
+    assert cache.misses == 2
+
+
+def test_parse_cache_is_bounded(tmp_path):
+    cache = parser.ParseCache(maxsize=2)
+    files = [write(tmp_path, f'C{i}.java', f'package p{i};\nclass C{i} {{}}\n') for i in range(3)]
+    for f in files:
+        cache.get(f)
+    assert cache.stats()['size'] == 2
+    cache.get(files[0])  # evicted as least recently used
+    assert cache.misses == 4
+
+
+TRICKY = '''/*
+ * import com.fake.Commented;
+ */
+package com.acme.svc;
+
+import com.acme.api.Quote; // import com.fake.Trailing;
+// import com.fake.LineComment;
+
+/**
+ * A class that mentions the word interface in its docs.
+ */
+@SuppressWarnings({"unchecked", "rawtypes"})
+@Doc(text = "import com.fake.InString; class X {", ch = '{')
+public class QuoteService
+    implements Quote {
+    private static final String BLOCK = """
+        import com.fake.InTextBlock;
+        """;
+    interface Nested {}
+}
+'''
+
+
+def test_scanner_ignores_comments_strings_and_annotation_braces(tmp_path):
+    rec = parser.parse_file(write(tmp_path, 'QuoteService.java', TRICKY))
+    assert rec.pkg == 'com.acme.svc'
+    assert rec.imports == ('com.acme.api.Quote',)
+    assert rec.implements == ('com.acme.api.Quote',)
+    assert rec.kind == 'class'
+
+
+def test_scan_header_stops_at_type_body(tmp_path):
+    f = write(tmp_path, 'QuoteService.java', TRICKY)
+    header = parser.scan_header(f, chunk_size=7)
+    assert header.rstrip().endswith('implements Quote')
+    assert 'InTextBlock' not in header and 'Commented' not in header
+    # line structure is preserved for the ^-anchored patterns
+    assert header.count('\n') == TRICKY[:TRICKY.index('implements Quote')].count('\n')
+
+
+def test_import_filter_matches_apply_filters_and_is_shared():
+    cfg = {'import_include_patterns': r'^com[.]acme[.]', 'import_exclude_patterns': r'[.]internal[.]|Test$'}
+    accept = parser.import_filter(cfg)
+    assert parser.import_filter(dict(cfg)) is accept
+    for name in ('com.acme.api.Pricing', 'com.acme.internal.Cache', 'com.acme.PricingTest', 'java.util.List'):
+        expected = parser.apply_filters(name, cfg['import_include_patterns'], cfg['import_exclude_patterns'])
+        assert accept(name) is expected
+        assert accept(name) is expected
+    assert parser.import_filter({'whitelist_regex': 'x'}).include == 'x'
+    assert parser.ImportFilter()('anything')
+
+
+def test_resolve_type_follows_java_order(tmp_path):
+    (tmp_path / 'svc').mkdir()
+    files = [
+        write(tmp_path, 'Base.java', 'package com.acme.base;\npublic class Base {}\n'),
+        write(tmp_path, 'Shape.java', 'package com.acme.base;\npublic interface Shape {}\n'),
+        write(tmp_path / 'svc', 'Shape.java', 'package com.acme.svc;\npublic interface Shape {}\n'),
+        write(tmp_path, 'Api.java', 'package com.acme.api;\npublic interface Api {}\n'),
+    ]
+    packages = parser.PackageIndex(lambda: files)
+    imports = ('com.acme.other.*', 'com.acme.base.*', 'com.acme.api.Api')
+    resolve = lambda name: parser.resolve_type(name, 'com.acme.svc', imports, packages)
+    assert resolve('Api') == 'com.acme.api.Api'            # single-type import
+    assert resolve('Shape') == 'com.acme.svc.Shape'        # own package before wildcards
+    assert resolve('Base') == 'com.acme.base.Base'         # first wildcard package declaring it
+    assert resolve('Runnable') == parser.UNRESOLVED + 'Runnable'
+    assert resolve('java.io.Serializable') == 'java.io.Serializable'
+    assert not parser.import_filter({})(resolve('Runnable'))
+    # without a package index, unimported names stay in the own package
+    assert parser.resolve_type('Base', 'com.acme.svc', imports) == 'com.acme.svc.Base'
+
+
+def test_parse_extends_resolves_same_package_superclass(tmp_path):
+    files = [
+        write(tmp_path, 'Base.java', 'package com.acme.svc;\npublic abstract class Base {}\n'),
+        write(tmp_path, 'Service.java',
+              'package com.acme.svc;\n\npublic class Service extends Base implements Runnable {}\n'),
+    ]
+    previous, parser.PACKAGES = parser.PACKAGES, parser.PackageIndex(lambda: files)
+    try:
+        # no import names Base: it is found in the own package, like an implemented type
+        assert parser.parse_extends(files[1]) == ('com.acme.svc.Base',)
+        assert parser.parse_package_and_imports(files[1])[2] == (parser.UNRESOLVED + 'Runnable',)
+    finally:
+        parser.PACKAGES = previous
+
+
+@pytest.mark.parametrize('clause, implements', [
+    ('', ()),
+    (' implements Comparable<Repo<T>>, java.io.Serializable', ('Comparable', 'java.io.Serializable')),
+])
+def test_parse_file_skips_type_parameter_bounds(tmp_path, clause, implements):
+    text = ('package a;\n\npublic class Repo<T extends Entity & Named, K extends Comparable<K>>\n'
+            f'    extends BaseRepo<T, Map<K, T>>{clause} {{\n}}\n')
+    rec = parser.parse_file(write(tmp_path, 'Repo.java', text))
+    assert rec.extends == ('BaseRepo',)
+    assert rec.implements == implements
+
+
+def test_declaration_keyword_is_not_read_from_annotation_arguments(tmp_path):
+    text = ('package a;\n\n@Entity(record = true, value = @Table(kind = Kind.interface))\n'
+            '@Audited(class)\npublic class Foo extends Base {\n}\n')
+    rec = parser.parse_file(write(tmp_path, 'Foo.java', text))
+    assert rec.kind == 'class'
+    assert rec.extends == ('Base',)
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+E2E test for --profile.
+"""
+
+import json
+import shutil
+
+import pytest
+
+from acme_tree import make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_profile_reports_phases_and_counters(tmp_path):
+    root = make_tree(tmp_path)
+    expected = run(tmp_path, str(root), 'com.acme.api.Pricing', '--reverse')
+    assert run(tmp_path, str(root), 'com.acme.api.Pricing', '--reverse', '--profile', 'profile.json') == expected
+    report = json.loads((tmp_path / 'profile.json').read_text())
+    assert {'config', 'files cache', 'traversal', 'sibling expansion', 'render'} <= set(report['phases'])
+    assert report['counters']['rg_calls'] > 0
+    assert report['counters']['files_parsed'] > 0
+    assert report['caches']['parse_cache']['misses'] == report['counters']['files_parsed']
+    assert report['peak_memory_bytes'] > 0
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+E2E test for --implicit-refs (refscan.py).
+"""
+
+import shutil
+
+import pytest
+
+from acme_tree import make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+@pytest.mark.parametrize('engine', ['rg-per-node', 'rg-frontier', 'graph', 'index'])
+def test_implicit_refs_add_same_package_and_qualified_users(tmp_path, engine):
+    root = make_tree(tmp_path)
+    api = root / 'src/main/java/com/acme/api'
+    # same package as Pricing, no import; the comment and string must not count
+    (api / 'PricingRules.java').write_text(
+        'package com.acme.api;\n\n// not Quote\npublic class PricingRules {\n  Pricing p;\n  String s = "Quote";\n}\n')
+    # fully-qualified reference, no import
+    (root / 'src/main/java/com/acme/svc/Audit.java').write_text(
+        'package com.acme.svc;\n\npublic class Audit {\n  com.acme.svc.Checkout c;\n}\n')
+    plain = run(tmp_path, str(root), 'com.acme.api.Pricing', '--reverse', '--engine', engine)
+    assert 'PricingRules' not in plain
+    implicit = run(tmp_path, str(root), 'com.acme.api.Pricing', '--reverse', '--engine', engine, '--implicit-refs')
+    assert '1- com.acme.api.PricingRules\n' in implicit
+    assert '3- com.acme.svc.Audit\n' in implicit
+    assert 'PricingRules' not in run(tmp_path, str(root), 'com.acme.api.Quote', '--reverse', '--implicit-refs')
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_implicit_refs_respect_single_type_import_shadowing(tmp_path):
+    root = make_tree(tmp_path)
+    svc = root / 'src/main/java/com/acme/svc'
+    (svc / 'Pricing.java').write_text('package com.acme.svc;\n\npublic class Pricing {\n}\n')
+    # `Pricing` here is the imported com.acme.api.Pricing, not the same-package class
+    (svc / 'Invoice.java').write_text(
+        'package com.acme.svc;\n\nimport com.acme.api.Pricing;\n\npublic class Invoice {\n  Pricing p;\n}\n')
+    (svc / 'Receipt.java').write_text('package com.acme.svc;\n\npublic class Receipt {\n  Pricing p;\n}\n')
+    implicit = run(tmp_path, str(root), 'com.acme.svc.Pricing', '--reverse', '--implicit-refs')
+    assert '1- com.acme.svc.Receipt\n' in implicit
+    assert 'Invoice' not in implicit
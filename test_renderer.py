@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Unit tests for renderer.py: DFS rendering of child trees.
+"""
+
+import io
+
+from renderer import Renderer
+
+
+def render(children, target, **kwargs):
+    out = io.StringIO()
+    count = Renderer().render_dfs(children, target, out=out, **kwargs)
+    return out.getvalue(), count
+
+
+def test_render_dfs_prints_preorder_and_revisits_without_descending():
+    children = {
+        't': [(1, 'a.A'), (1, 'b.B')],
+        'a.A': [(2, 'c.C')],
+        'b.B': [(2, 'c.C'), (2, 'b.BImpl')],
+        'c.C': [(3, 'd.D')],
+    }
+    text, count = render(children, 't', top_extras=['x.X'], allow_impl_pairs=True)
+    assert text == 't\nx.X\n1- a.A\n  2- c.C\n    3- d.D\n1- b.B\n  2- c.C\n  2- b.BImpl\n'
+    assert count == 7
+
+
+def test_render_dfs_skips_excluded_impls_without_impl_pairs():
+    text, count = render({'t': [(1, 'a.AImpl'), (1, 'a.A')]}, 't')
+    assert text == 't\n1- a.A\n'
+    assert count == 1
+
+
+def test_render_dfs_handles_chains_deeper_than_the_recursion_limit():
+    depth = 5000
+    children = {f'n{i}': [(i + 1, f'n{i + 1}')] for i in range(depth)}
+    text, count = render(children, 'n0')
+    lines = text.splitlines()
+    assert count == depth
+    assert lines[-1] == '  ' * (depth - 1) + f'{depth}- n{depth}'
+
+
+def test_render_patterns_are_combined_like_separate_searches():
+    children = {'t': [(1, 'a.Keep'), (1, 'a.Drop'), (1, 'b.Other'), (1, 'aa.Keep')]}
+    out = io.StringIO()
+    Renderer(render_include_patterns=r'^a[.], (x)\1, Other$').render_dfs(children, 't', out=out)
+    assert out.getvalue() == 't\n1- a.Keep\n1- a.Drop\n1- b.Other\n'
+    out = io.StringIO()
+    Renderer(render_exclude_patterns=r'Drop$, ^b[.]').render_dfs(children, 't', out=out)
+    assert out.getvalue() == 't\n1- a.Keep\n1- aa.Keep\n'
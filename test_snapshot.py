@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+E2E test for graph snapshots (--save-graph/--load-graph).
+"""
+
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from acme_tree import SCRIPT, add_generic_repo, make_tree, run
+
+
+@pytest.mark.skipif(shutil.which('rg') is None, reason='ripgrep not installed')
+def test_loaded_graph_snapshot_answers_without_the_source_tree(tmp_path):
+    from snapshot import GraphSnapshot
+
+    root = make_tree(tmp_path)
+    (root / 'src/main/java/com/acme/svc/Premium.java').write_text(
+        'package com.acme.svc;\n\npublic class Premium extends Checkout {\n}\n')
+    add_generic_repo(root)
+    queries = [['com.acme.api.Pricing', '--reverse'], ['com.acme.impl.PricingImpl', '--reverse', '--levels', '1'],
+               ['QuoteService'], ['Premium', '--forward'], ['com.acme.repo.Repo', '--forward'],
+               ['--all-blast-radius'], []]
+    expected = [run(tmp_path, str(root), *args) for args in queries]
+    assert '1- com.acme.repo.BaseRepo\n' in expected[4] and 'com.acme.repo.BaseRepo,1,1' in expected[5]
+    run(tmp_path, str(root), '--save-graph', 'graph.snap')
+    snap = GraphSnapshot.load(tmp_path / 'graph.snap')
+    assert snap.changed_files() == []
+    (root / 'src/main/java/com/acme/svc/Checkout.java').write_text('package com.acme.svc;\n')
+    assert snap.changed_files() == ['src/main/java/com/acme/svc/Checkout.java']
+    result = subprocess.run([sys.executable, str(SCRIPT), '--load-graph', 'graph.snap'],
+                            capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode == 0 and result.stdout == expected[-1]
+    assert 'Warning: 1 file(s)' in result.stderr
+    root.rename(tmp_path / 'moved')
+    for args, want in zip(queries, expected):
+        assert run(tmp_path, '.', *args, '--load-graph', 'graph.snap') == want
+    # the root comes from the snapshot, so a lone positional argument is the target
+    assert run(tmp_path, '--load-graph', 'graph.snap', 'com.acme.api.Pricing', '--reverse') == expected[0]
+    result = subprocess.run([sys.executable, str(SCRIPT), 'elsewhere', 'com.acme.api.Pricing', '--reverse',
+                             '--load-graph', 'graph.snap'], capture_output=True, text=True, cwd=tmp_path)
+    assert result.returncode == 1 and "drop the root argument 'elsewhere'" in result.stderr
+    (tmp_path / 'bad.snap').write_bytes(b'not a snapshot')
+    with pytest.raises(ValueError):
+        GraphSnapshot.load(tmp_path / 'bad.snap')